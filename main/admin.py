@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Category, Manufacturer, Supplier, Product, Profile, PickupPoint, Order, OrderItem
+from .models import (Category, Manufacturer, Supplier, Product, Profile, PickupPoint, Order, OrderItem,
+                     PhotoTask)
 
 admin.site.register(Category)
 admin.site.register(Manufacturer)
@@ -8,4 +9,5 @@ admin.site.register(Product)
 admin.site.register(Profile)
 admin.site.register(PickupPoint)
 admin.site.register(Order)
-admin.site.register(OrderItem)
\ No newline at end of file
+admin.site.register(OrderItem)
+admin.site.register(PhotoTask)
\ No newline at end of file
@@ -0,0 +1,34 @@
+"""
+SQLite, настроенный на параллельную запись из нескольких процессов.
+
+Дополнительные ключи OPTIONS (повторяют опции бэкенда из Django 5.1):
+
+- init_command — PRAGMA через ";", выполняемые на каждом новом соединении
+  (WAL, synchronous=NORMAL, mmap и т. п.);
+- transaction_mode — режим BEGIN для transaction.atomic(). С IMMEDIATE
+  транзакция сразу берёт блокировку записи и при занятой базе ждёт её
+  (OPTIONS['timeout']), а не падает с "database is locked", когда
+  начавшаяся с чтения транзакция пытается что-то записать.
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.init_command = params.pop('init_command', '')
+        self.transaction_mode = params.pop('transaction_mode', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for statement in self.init_command.split(';'):
+            if statement.strip():
+                conn.execute(statement)
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode:
+            self.cursor().execute(f'BEGIN {self.transaction_mode}')
+        else:
+            super()._start_transaction_under_autocommit()
@@ -0,0 +1,90 @@
+"""
+Кэш отрендеренных фрагментов каталога.
+
+Ключ фрагмента включает номер версии каталога. Любое изменение товара или
+справочника (см. main/signals.py) увеличивает версию, и все старые ключи
+просто перестают использоваться — инвалидация за O(1), без перебора ключей.
+Устаревшие записи вытесняются самим кэшем по таймауту.
+
+Так же версионируются профили пользователей: роль, закэшированная в сессии
+(main/roles.py), действительна, пока не изменилась версия профиля.
+
+Используются именованные кэши из settings.CACHES: fragments — HTML,
+querysets — результаты запросов (данные JSON-ответов каталога). Версии
+каталога и профилей хранятся в кэше versions, который всегда общий для всех
+процессов: версию увеличивают и процессы сервера, и команды manage.py
+(import_data, load_fixture), а фрагменты и роли, закэшированные другим
+процессом, должны устареть вместе с ней.
+"""
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.core.cache import caches
+from django.utils.safestring import mark_safe
+
+CATALOG_VERSION_KEY = 'catalog:version'
+PROFILE_VERSION_KEY = 'profile:version:{}'
+FRAGMENT_TIMEOUT = 300
+QUERYSET_TIMEOUT = 60
+
+
+def _version(cache, key):
+    version = cache.get(key)
+    if version is None:
+        # Начальное значение от времени: если ключ версии вытеснили, новая
+        # версия не совпадёт с версиями ещё живых записей
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(cache, key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        _version(cache, key)
+
+
+def catalog_version():
+    return _version(caches['versions'], CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version():
+    _bump(caches['versions'], CATALOG_VERSION_KEY)
+
+
+def profile_version(user_id):
+    """Версия профиля пользователя: по ней сверяется роль, закэшированная в сессии."""
+    return _version(caches['versions'], PROFILE_VERSION_KEY.format(user_id))
+
+
+def bump_profile_version(user_id):
+    _bump(caches['versions'], PROFILE_VERSION_KEY.format(user_id))
+
+
+def fragment_key(name, params, role):
+    """Ключ фрагмента name для GET-параметров params (QueryDict) и роли пользователя."""
+    # urlencode экранирует & и = в значениях: разные наборы параметров не совпадут
+    query = urlencode(sorted(params.lists()), doseq=True)
+    digest = hashlib.md5(query.encode('utf-8')).hexdigest()
+    return f'catalog:{catalog_version()}:{role}:{name}:{digest}'
+
+
+def get_or_render(key, render):
+    cache = caches['fragments']
+    html = cache.get(key)
+    if html is None:
+        html = render()
+        cache.set(key, html, FRAGMENT_TIMEOUT)
+    return mark_safe(html)
+
+
+def get_or_query(key, query, timeout=QUERYSET_TIMEOUT):
+    """Результат query() из кэша querysets; значение должно сериализоваться pickle."""
+    cache = caches['querysets']
+    result = cache.get(key)
+    if result is None:
+        result = query()
+        cache.set(key, result, timeout)
+    return result
@@ -0,0 +1,78 @@
+"""
+Бэкенды кэша Django со счётчиками попаданий.
+
+Каждый get() считается попаданием или промахом. Счётчики копятся в процессе
+и каждые STATS_FLUSH_EVERY обращений прибавляются к общим значениям в самом
+кэше, поэтому для общего (файлового или табличного) кэша статистика
+суммируется по всем процессам. Смотреть её — страница cache_stats.
+"""
+from django.core.cache.backends import db, filebased, locmem
+
+STATS_FLUSH_EVERY = 100
+STATS_KEYS = {'hits': 'cache-stats:hits', 'misses': 'cache-stats:misses'}
+
+_missing = object()
+
+
+class StatsMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pending = {'hits': 0, 'misses': 0}
+        self._tracking = True
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _missing, version=version)
+        if self._tracking:
+            self._pending['misses' if value is _missing else 'hits'] += 1
+            if sum(self._pending.values()) >= STATS_FLUSH_EVERY:
+                self.flush_stats()
+        return default if value is _missing else value
+
+    def incr(self, key, delta=1, version=None):
+        # Базовый incr() читает значение через get() — это не обращение за данными
+        tracking, self._tracking = self._tracking, False
+        try:
+            return super().incr(key, delta, version=version)
+        finally:
+            self._tracking = tracking
+
+    def flush_stats(self):
+        """Прибавляет накопленные в процессе счётчики к общим."""
+        pending, self._pending = self._pending, {'hits': 0, 'misses': 0}
+        for name, count in pending.items():
+            if not count:
+                continue
+            self.add(STATS_KEYS[name], 0, None)
+            try:
+                self.incr(STATS_KEYS[name], count)
+            except ValueError:
+                # Ключ вытеснили между add() и incr()
+                self.set(STATS_KEYS[name], count, None)
+
+    def stats(self):
+        """Попадания, промахи и доля попаданий (None, если обращений не было)."""
+        self.flush_stats()
+        tracking, self._tracking = self._tracking, False
+        try:
+            hits, misses = (self.get(STATS_KEYS[name], 0) for name in ('hits', 'misses'))
+        finally:
+            self._tracking = tracking
+        total = hits + misses
+        return {'hits': hits, 'misses': misses,
+                'hit_rate': round(hits / total, 4) if total else None}
+
+    def reset_stats(self):
+        self._pending = {'hits': 0, 'misses': 0}
+        self.delete_many(list(STATS_KEYS.values()))
+
+
+class LocMemCache(StatsMixin, locmem.LocMemCache):
+    pass
+
+
+class FileBasedCache(StatsMixin, filebased.FileBasedCache):
+    pass
+
+
+class DatabaseCache(StatsMixin, db.DatabaseCache):
+    pass
@@ -0,0 +1,6 @@
+from .roles import user_role
+
+
+def role(request):
+    """Флаги роли текущего пользователя: {{ role.is_admin }}, {{ role.full_name }} и т. д."""
+    return {'role': user_role(request.user)}
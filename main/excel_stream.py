@@ -0,0 +1,39 @@
+"""
+Потоковое чтение больших xlsx-файлов.
+
+openpyxl в режиме read_only разбирает лист построчно, не загружая книгу
+целиком, поэтому память ограничена размером одной пачки строк.
+"""
+from openpyxl import load_workbook
+
+
+def iter_row_chunks(path, chunk_size, names=None, skip=0):
+    """
+    Отдаёт строки первого листа пачками по chunk_size.
+
+    Каждая пачка — пара (номер следующей строки данных, список словарей).
+    Если names не задан, имена колонок берутся из первой строки листа.
+    skip строк данных пропускаются — это позволяет продолжить импорт
+    с места, на котором он прервался. Пустые строки пропускаются, но
+    учитываются в нумерации.
+    """
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        if names is None:
+            header = next(rows, ())
+            names = [str(name) if name is not None else '' for name in header]
+
+        chunk = []
+        index = 0
+        for index, values in enumerate(rows, start=1):
+            if index <= skip or all(value is None for value in values):
+                continue
+            chunk.append(dict(zip(names, values)))
+            if len(chunk) >= chunk_size:
+                yield index, chunk
+                chunk = []
+        if chunk:
+            yield index, chunk
+    finally:
+        workbook.close()
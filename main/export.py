@@ -0,0 +1,193 @@
+"""
+Потоковая выгрузка товаров, заказов и позиций заказов.
+
+Строки читаются из queryset.values_list(...).iterator(chunk_size), поэтому
+в памяти одновременно находится только одна пачка строк, сколько бы их ни
+было в таблице. CSV и JSON Lines отдаются кусками байтов по мере чтения
+и при желании сжимаются на лету (gzip, либо zstd, если установлен пакет
+zstandard). XLSX — zip-архив, его нельзя отдавать по мере записи: книга
+пишется в режиме write_only во временный файл, который отдаётся целиком.
+"""
+import csv
+import json
+import zlib
+from decimal import Decimal
+
+from openpyxl import Workbook
+
+from .models import Order, OrderItem, Product, line_total
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CHUNK_SIZE = 2000
+
+CENT = Decimal('0.01')
+
+FORMATS = ('csv', 'jsonl', 'xlsx')
+COMPRESSIONS = ('gzip', 'zstd')
+
+# Расширение файла для формата и сжатия
+EXTENSIONS = {'csv': 'csv', 'jsonl': 'jsonl', 'xlsx': 'xlsx', 'gzip': 'gz', 'zstd': 'zst'}
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'gzip': 'application/gzip',
+    'zstd': 'application/zstd',
+}
+
+
+def _products():
+    return Product.objects.with_effective_price().order_by('id')
+
+
+def _orders():
+    return Order.objects.with_totals().order_by('id')
+
+
+def _order_items():
+    return OrderItem.objects.annotate(line_total=line_total()).order_by('id')
+
+
+# Выгрузка -> (queryset, колонки: (ключ в JSON Lines, заголовок, путь для values_list))
+EXPORTS = {
+    'products': (_products, [
+        ('id', 'ID', 'id'),
+        ('article', 'Артикул', 'article'),
+        ('name', 'Наименование товара', 'name'),
+        ('unit', 'Единица измерения', 'unit'),
+        ('price', 'Цена', 'price'),
+        ('discount', 'Действующая скидка', 'discount'),
+        ('effective_price', 'Цена со скидкой', 'effective_price'),
+        ('quantity_in_stock', 'Кол-во на складе', 'quantity_in_stock'),
+        ('quantity_reserved', 'В резерве', 'quantity_reserved'),
+        ('supplier', 'Поставщик', 'supplier__name'),
+        ('manufacturer', 'Производитель', 'manufacturer__name'),
+        ('category', 'Категория товара', 'category__name'),
+        ('description', 'Описание товара', 'description'),
+        ('photo', 'Фото', 'photo'),
+    ]),
+    'orders': (_orders, [
+        ('id', 'ID', 'id'),
+        ('order_number', 'Номер заказа', 'order_number'),
+        ('order_date', 'Дата заказа', 'order_date'),
+        ('delivery_date', 'Дата доставки', 'delivery_date'),
+        ('pickup_point', 'Пункт выдачи', 'pickup_point__address'),
+        ('client', 'Клиент', 'client__full_name'),
+        ('pickup_code', 'Код для получения', 'pickup_code'),
+        ('status', 'Статус', 'status'),
+        ('items_count', 'Позиций', 'items_count'),
+        ('total_amount', 'Сумма', 'total_amount'),
+    ]),
+    'order_items': (_order_items, [
+        ('id', 'ID', 'id'),
+        ('order_number', 'Номер заказа', 'order__order_number'),
+        ('article', 'Артикул', 'product__article'),
+        ('product', 'Наименование товара', 'product__name'),
+        ('quantity', 'Количество', 'quantity'),
+        ('line_total', 'Стоимость', 'line_total'),
+    ]),
+}
+
+
+def export_filename(name, fmt, compression=None):
+    filename = f'{name}.{EXTENSIONS[fmt]}'
+    return f'{filename}.{EXTENSIONS[compression]}' if compression else filename
+
+
+def _rows(name, chunk_size):
+    queryset, columns = EXPORTS[name]
+    rows = queryset().values_list(*(path for _, _, path in columns)).iterator(chunk_size=chunk_size)
+    for row in rows:
+        # Суммы из подзапросов SQLite возвращает с произвольным числом знаков
+        yield tuple(value.quantize(CENT) if isinstance(value, Decimal) else value for value in row)
+
+
+class _Lines:
+    """Файлоподобный приёмник для csv.writer: копит строки до сброса."""
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, value):
+        self.parts.append(value)
+
+    def pop(self):
+        text = ''.join(self.parts)
+        self.parts.clear()
+        return text
+
+
+def _csv_chunks(name, chunk_size):
+    _, columns = EXPORTS[name]
+    lines = _Lines()
+    writer = csv.writer(lines)
+    writer.writerow(header for _, header, _ in columns)
+    # BOM — чтобы Excel открыл файл в UTF-8, а не в cp1251
+    yield '\ufeff' + lines.pop()
+    for count, row in enumerate(_rows(name, chunk_size), start=1):
+        writer.writerow(row)
+        if count % chunk_size == 0:
+            yield lines.pop()
+    yield lines.pop()
+
+
+def _jsonl_chunks(name, chunk_size):
+    _, columns = EXPORTS[name]
+    keys = [key for key, _, _ in columns]
+    lines = []
+    for row in _rows(name, chunk_size):
+        lines.append(json.dumps(dict(zip(keys, row)), ensure_ascii=False, default=str))
+        if len(lines) >= chunk_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def _compressor(compression):
+    if compression == 'gzip':
+        return zlib.compressobj(wbits=31)  # 31 — заголовок и контрольная сумма gzip
+    if zstandard is None:
+        raise ValueError('Для сжатия zstd нужен пакет zstandard (pip install zstandard)')
+    return zstandard.ZstdCompressor().compressobj()
+
+
+def stream_export(name, fmt, compression=None, chunk_size=CHUNK_SIZE):
+    """
+    Куски байтов выгрузки name в формате csv или jsonl.
+
+    Параметры проверяются сразу, до начала выгрузки.
+    """
+    if fmt not in ('csv', 'jsonl'):
+        raise ValueError(f'Потоковая выгрузка поддерживает только csv и jsonl, не {fmt}')
+    compressor = _compressor(compression) if compression else None
+    chunks = (_csv_chunks if fmt == 'csv' else _jsonl_chunks)(name, chunk_size)
+
+    def encoded():
+        for chunk in chunks:
+            data = chunk.encode('utf-8')
+            if compressor is None:
+                yield data
+            else:
+                data = compressor.compress(data)
+                if data:
+                    yield data
+        if compressor is not None:
+            yield compressor.flush()
+
+    return encoded()
+
+
+def write_xlsx(name, fileobj, chunk_size=CHUNK_SIZE):
+    """Пишет выгрузку name в книгу xlsx (openpyxl write_only: строки не копятся в памяти)."""
+    _, columns = EXPORTS[name]
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(name)
+    sheet.append([header for _, header, _ in columns])
+    for row in _rows(name, chunk_size):
+        sheet.append(row)
+    workbook.save(fileobj)
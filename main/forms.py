@@ -1,7 +1,153 @@
 from django import forms
-from django.forms import inlineformset_factory
+from django.forms import BaseInlineFormSet, inlineformset_factory
+from django.urls import reverse_lazy
+from django.utils.functional import cached_property
 from .models import Product, Order, OrderItem
 
+def product_label(product):
+    return f'{product.article} — {product.name}'
+
+class ProductAutocomplete(forms.Widget):
+    """
+    Поле выбора товара с подсказками вместо <select> со всем каталогом.
+
+    В форму уходит скрытое поле с id товара, а варианты для видимого поля
+    подгружаются скриптом main/js/product_autocomplete.js из product_lookup.
+    """
+    input_type = 'hidden'
+    template_name = 'main/widgets/product_autocomplete.html'
+
+    def __init__(self, attrs=None):
+        super().__init__(attrs)
+        self.products = {}
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        product = self.products.get(str(value)) if value not in (None, '') else None
+        context['widget'].update({
+            'type': self.input_type,
+            'label': product_label(product) if product else '',
+            'lookup_url': reverse_lazy('product_lookup'),
+        })
+        return context
+
+class PrefetchedModelChoiceField(forms.ModelChoiceField):
+    """
+    ModelChoiceField, который ищет выбранный объект в заранее загруженном
+    словаре objects (id строкой -> объект), а не отдельным запросом.
+
+    Формсет заполняет словарь один раз на все строки; пока он не задан,
+    поле работает как обычный ModelChoiceField.
+    """
+
+    def __init__(self, queryset, **kwargs):
+        super().__init__(queryset, **kwargs)
+        self.objects = None
+
+    def to_python(self, value):
+        if value in self.empty_values or self.objects is None:
+            return super().to_python(value)
+        obj = self.objects.get(str(value))
+        if obj is None:
+            raise forms.ValidationError(self.error_messages['invalid_choice'], code='invalid_choice')
+        return obj
+
+class ProductChoiceField(PrefetchedModelChoiceField):
+    """Выбор товара по id без перебора всего каталога."""
+    widget = ProductAutocomplete
+
+    def __init__(self, queryset=None, **kwargs):
+        super().__init__(Product.objects.all() if queryset is None else queryset, **kwargs)
+
+class OrderItemForm(forms.ModelForm):
+    def _get_validation_exclusions(self):
+        # Товар уже найден полем ProductChoiceField, а проверка внешнего
+        # ключа моделью стоила бы ещё одного запроса на каждую строку
+        exclude = super()._get_validation_exclusions()
+        exclude.add('product')
+        return exclude
+
+class BaseOrderItemFormSet(BaseInlineFormSet):
+    @cached_property
+    def products(self):
+        """Все товары, упомянутые в строках формсета, одним запросом."""
+        if self.is_bound:
+            ids = {self.data.get(f'{self.add_prefix(i)}-product')
+                   for i in range(self.total_form_count())}
+        else:
+            ids = {item.product_id for item in self.get_queryset()}
+        ids = [int(pk) for pk in ids if pk and str(pk).isdigit()]
+        return {str(pk): product
+                for pk, product in Product.objects.in_bulk(ids).items()} if ids else {}
+
+    @cached_property
+    def items(self):
+        """Существующие позиции заказа (id строкой -> OrderItem)."""
+        return {str(item.pk): item for item in self.get_queryset()}
+
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        field = form.fields['product']
+        field.objects = field.widget.products = self.products
+        # Стандартное скрытое поле id проверяет каждую строку отдельным запросом
+        pk_name = self.model._meta.pk.name
+        pk_field = form.fields[pk_name]
+        form.fields[pk_name] = PrefetchedModelChoiceField(
+            pk_field.queryset, initial=pk_field.initial, required=False, widget=pk_field.widget)
+        form.fields[pk_name].objects = self.items
+
+    def quantities(self, initial=False):
+        """
+        Количество по товарам: {id товара: количество}.
+
+        initial=True — как было в заказе до правки, иначе — после проверки
+        формсета, без удалённых и пустых строк.
+        """
+        result = {}
+        if initial:
+            rows = [(form.initial.get('product'), form.initial.get('quantity'))
+                    for form in self.initial_forms]
+        else:
+            deleted = self.deleted_forms
+            forms = self.initial_forms + [form for form in self.extra_forms if form.has_changed()]
+            rows = [(form.cleaned_data['product'].pk, form.cleaned_data['quantity'])
+                    for form in forms if form not in deleted]
+        for product_id, quantity in rows:
+            if product_id is not None:
+                result[product_id] = result.get(product_id, 0) + quantity
+        return result
+
+    def save_bulk(self, order):
+        """
+        Сохраняет позиции заказа пачками: одно удаление, bulk_update и bulk_create.
+
+        Вызывается внутри transaction.atomic() после is_valid() и
+        apply_stock_changes(): условные UPDATE остатков уже заблокировали
+        строки затронутых товаров до конца транзакции.
+        """
+        self.instance = order
+        self.new_objects, self.changed_objects, self.deleted_objects = [], [], []
+        deleted = self.deleted_forms
+        for form in self.initial_forms:
+            if form in deleted:
+                self.deleted_objects.append(form.instance)
+            elif form.has_changed():
+                self.changed_objects.append((form.save(commit=False), form.changed_data))
+        for form in self.extra_forms:
+            if form.has_changed() and form not in deleted:
+                item = form.save(commit=False)
+                item.order = order
+                self.new_objects.append(item)
+
+        changed = [item for item, fields in self.changed_objects]
+        if self.deleted_objects:
+            OrderItem.objects.filter(order=order,
+                                     pk__in=[item.pk for item in self.deleted_objects]).delete()
+        if changed:
+            OrderItem.objects.bulk_update(changed, ['product', 'quantity'])
+        if self.new_objects:
+            OrderItem.objects.bulk_create(self.new_objects)
+
 class ProductForm(forms.ModelForm):
     class Meta:
         model = Product
@@ -10,6 +156,18 @@ class ProductForm(forms.ModelForm):
             'description': forms.Textarea(attrs={'rows': 3}),
         }
 
+    def clean(self):
+        cleaned_data = super().clean()
+        quantity = cleaned_data.get('quantity_in_stock')
+        if self.instance.pk and quantity is not None:
+            # Текущий резерв из базы: пока форма была открыта, могли прийти заказы
+            reserved = Product.objects.filter(pk=self.instance.pk).values_list(
+                'quantity_reserved', flat=True).first() or 0
+            if quantity < reserved:
+                self.add_error('quantity_in_stock',
+                               f'Нельзя меньше, чем зарезервировано под заказы ({reserved})')
+        return cleaned_data
+
 class OrderForm(forms.ModelForm):
     class Meta:
         model = Order
@@ -21,7 +179,9 @@ class OrderForm(forms.ModelForm):
         }
 
 OrderItemFormSet = inlineformset_factory(
-    Order, OrderItem, fields=('product', 'quantity'),
+    Order, OrderItem, form=OrderItemForm, formset=BaseOrderItemFormSet,
+    fields=('product', 'quantity'),
     extra=1, can_delete=True,
-    widgets={'product': forms.Select(attrs={'class': 'product-select'})}
+    field_classes={'product': ProductChoiceField},
+    widgets={'product': ProductAutocomplete(attrs={'class': 'product-select'})}
 )
\ No newline at end of file
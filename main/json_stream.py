@@ -0,0 +1,71 @@
+"""
+Потоковое чтение больших JSON-дампов.
+
+Дамп manage.py dumpdata — один JSON-массив объектов, и json.load разбирает
+его целиком. Здесь элементы массива декодируются по одному из буфера,
+который дочитывается из файла блоками, поэтому память ограничена размером
+блока и одного объекта.
+"""
+import json
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+
+class _Buffer:
+    def __init__(self, f, block_size):
+        self.f = f
+        self.block_size = block_size
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def read_more(self):
+        block = self.f.read(self.block_size)
+        self.eof = not block
+        self.text = self.text[self.pos:] + block
+        self.pos = 0
+
+    def next_char(self):
+        """Первый непробельный символ с текущей позиции ('' в конце файла)."""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text) or self.eof:
+                return self.text[self.pos:self.pos + 1]
+            self.read_more()
+
+    def decode(self):
+        self.next_char()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self.read_more()
+                continue
+            # Число на границе блока могло декодироваться не полностью
+            if end == len(self.text) and not self.eof:
+                self.read_more()
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_array(f, block_size=1 << 20):
+    """Отдаёт элементы JSON-массива из текстового файла f по одному."""
+    buffer = _Buffer(f, block_size)
+    if buffer.next_char() != '[':
+        raise ValueError('Ожидается JSON-массив')
+    buffer.pos += 1
+    if buffer.next_char() == ']':
+        return
+    while True:
+        yield buffer.decode()
+        char = buffer.next_char()
+        buffer.pos += 1
+        if char == ']':
+            return
+        if char != ',':
+            raise ValueError(f'Ожидается "," или "]", получено {char!r}')
@@ -0,0 +1,164 @@
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, reset_queries
+from django.db.models import Max
+from django.test import Client
+from django.test.utils import override_settings
+
+from main.cache import bump_catalog_version
+from main.models import Order, PickupPoint, Product, Profile
+
+SCENARIOS = ('products', 'orders', 'order_write')
+
+# Суффикс копии базы и префикс ключей кэша на время замера
+BENCHMARK_SUFFIX = 'benchmark'
+
+
+@contextmanager
+def throwaway_database():
+    """
+    Подменяет базу default её копией и удаляет копию после замера.
+
+    Сценарий order_write создаёт и удаляет заказы, products сбрасывает
+    версию каталога — ни рабочая база, ни общий кэш этого видеть не должны.
+    Копию делает тот же механизм, что и у параллельного прогона тестов
+    Django: файл рядом с базой SQLite или CREATE DATABASE ... TEMPLATE в
+    PostgreSQL (к исходной базе не должно быть других подключений).
+    Дочерние процессы (fork) наследуют подменённые настройки.
+    """
+    creation = connection.creation
+    if connection.vendor == 'sqlite':
+        # Копируется только основной файл: переносим в него журнал WAL
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    connections.close_all()
+    original = dict(connection.settings_dict)
+    creation.clone_test_db(BENCHMARK_SUFFIX, verbosity=0, autoclobber=True)
+    connection.settings_dict.update(creation.get_test_db_clone_settings(BENCHMARK_SUFFIX))
+    caches = {alias: {**options, 'KEY_PREFIX': BENCHMARK_SUFFIX}
+              for alias, options in settings.CACHES.items()}
+    try:
+        with override_settings(CACHES=caches):
+            yield
+    finally:
+        connections.close_all()
+        connection.settings_dict.update(original)
+        creation.destroy_test_db(verbosity=0, suffix=BENCHMARK_SUFFIX)
+
+
+def _client(user_id):
+    # localhost разрешён при DEBUG и пустом ALLOWED_HOSTS, в отличие от testserver
+    client = Client(SERVER_NAME='localhost')
+    client.force_login(Profile.objects.select_related('user').get(user_id=user_id).user)
+    return client
+
+
+def _run(scenario, user_id, requests, numbers, order_data):
+    """Выполняет requests запросов сценария в отдельном процессе; возвращает длительности."""
+    client = _client(user_id)
+    durations, errors = [], 0
+    for i in range(requests):
+        started = time.perf_counter()
+        if scenario == 'products':
+            # Новая версия каталога — фрагмент не берётся из кэша, запрос доходит до базы
+            bump_catalog_version()
+            response = client.get('/', {'sort': ('price_asc', 'name_desc', '')[i % 3]})
+            ok = response.status_code == 200
+        elif scenario == 'orders':
+            response = client.get('/orders/')
+            ok = response.status_code == 200
+        else:
+            response = client.post('/order/add/', dict(order_data, order_number=numbers[i]))
+            ok = response.status_code == 302
+            if ok:
+                order = Order.objects.only('pk').get(order_number=numbers[i])
+                ok = client.post(f'/order/{order.pk}/delete/').status_code == 302
+        durations.append(time.perf_counter() - started)
+        errors += not ok
+        reset_queries()
+    connections.close_all()
+    return durations, errors
+
+
+class Command(BaseCommand):
+    help = ('Замеряет пропускную способность страниц каталога и заказов на копии текущей базы. '
+            'Для сравнения запустите с DB_ENGINE=sqlite и DB_ENGINE=postgresql')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Число параллельных процессов-клиентов'
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=100,
+            help='Запросов на процесс в каждом сценарии'
+        )
+        parser.add_argument(
+            '--scenario',
+            choices=SCENARIOS,
+            action='append',
+            help='Сценарий (можно несколько): products, orders, order_write. По умолчанию все'
+        )
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            self.benchmark(options)
+        self.stdout.write(self.style.SUCCESS('Готово'))
+
+    def benchmark(self, options):
+        workers = options['workers']
+        requests = options['requests']
+        admin = Profile.objects.filter(role='admin').first()
+        client = Profile.objects.filter(role='client').first()
+        pickup_point = PickupPoint.objects.first()
+        product = Product.objects.order_by('-quantity_in_stock').first()
+        if None in (admin, client, pickup_point, product):
+            raise CommandError('База пуста — сначала выполните manage.py import_data')
+
+        db = connection.settings_dict
+        self.stdout.write(f'База: {connection.vendor} (копия: {db["NAME"]}), '
+                          f'CONN_MAX_AGE={db.get("CONN_MAX_AGE", 0)}, '
+                          f'процессов: {workers}, запросов на процесс: {requests}')
+
+        first_number = (Order.objects.aggregate(last=Max('order_number'))['last'] or 0) + 1
+        order_data = {
+            'order_date': '2026-01-01', 'delivery_date': '2026-01-05',
+            'pickup_point': pickup_point.pk, 'client': client.pk, 'pickup_code': '0',
+            'status': 'new',
+            'items-TOTAL_FORMS': 1, 'items-INITIAL_FORMS': 0,
+            'items-MIN_NUM_FORMS': 0, 'items-MAX_NUM_FORMS': 1000,
+            'items-0-product': product.pk, 'items-0-quantity': 1,
+        }
+
+        for scenario in options['scenario'] or SCENARIOS:
+            jobs = []
+            for worker in range(workers):
+                start = first_number + worker * requests
+                jobs.append((scenario, admin.user_id, requests,
+                             list(range(start, start + requests)), order_data))
+            first_number += workers * requests
+
+            # Дочерние процессы должны открыть собственные соединения с базой
+            connections.close_all()
+            started = time.perf_counter()
+            with ProcessPoolExecutor(workers) as executor:
+                results = list(executor.map(_run, *zip(*jobs)))
+            elapsed = time.perf_counter() - started
+
+            durations = sorted(d for worker_durations, _ in results for d in worker_durations)
+            errors = sum(e for _, e in results)
+            p95 = durations[int(len(durations) * 0.95) - 1]
+            self.stdout.write(
+                f'{scenario:12} {len(durations) / elapsed:8.1f} запр/с   '
+                f'медиана {statistics.median(durations) * 1000:7.1f} мс   '
+                f'p95 {p95 * 1000:7.1f} мс   ошибок: {errors}'
+            )
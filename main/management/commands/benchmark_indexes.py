@@ -0,0 +1,115 @@
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from main.models import (Category, Manufacturer, Supplier, Product, Profile,
+                         PickupPoint, Order)
+from main.pagination import PAGE_SIZE, order_for_sort
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает планы и время запросов каталога и заказов с индексами и без них '
+            'на сгенерированных данных (все изменения откатываются)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100000)
+        parser.add_argument('--orders', type=int, default=100000)
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Сколько раз выполнять каждый запрос')
+
+    def handle(self, *args, **options):
+        self.repeat = options['repeat']
+        try:
+            with transaction.atomic():
+                self._seed(options['products'], options['orders'])
+                with_indexes = self._measure('indexed')
+                self._drop_indexes()
+                without_indexes = self._measure('plain')
+                raise Rollback
+        except Rollback:
+            pass
+
+        for name in with_indexes:
+            plan_on, time_on = with_indexes[name]
+            plan_off, time_off = without_indexes[name]
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(f'  без индексов: {time_off * 1000:8.2f} мс  {plan_off}')
+            self.stdout.write(f'  с индексами:  {time_on * 1000:8.2f} мс  {plan_on}')
+
+    def _queries(self):
+        products = Product.objects.select_related('category', 'supplier', 'manufacturer')
+        queries = {
+            f'Каталог, sort={sort}': order_for_sort(products, sort)[:PAGE_SIZE]
+            for sort in ('price_asc', 'price_desc', 'name_asc', 'quantity_desc')
+        }
+        queries['Каталог, скидка 19+'] = order_for_sort(products.filter(discount__gte=19), '')[:PAGE_SIZE]
+        queries['Каталог, скидка 12-18.99, sort=price_asc'] = order_for_sort(
+            products.filter(discount__gte=12, discount__lt=19), 'price_asc')[:PAGE_SIZE]
+        queries['Заказы, -order_date'] = Order.objects.order_by('-order_date', '-id')[:PAGE_SIZE]
+        queries['Клиенты (role=client)'] = Profile.objects.filter(role='client').order_by('full_name')[:PAGE_SIZE]
+        return queries
+
+    def _measure(self, phase):
+        results = {}
+        for name, queryset in self._queries().items():
+            started = time.perf_counter()
+            for _ in range(self.repeat):
+                list(queryset.all())
+            results[name] = (self._plan(queryset, phase), (time.perf_counter() - started) / self.repeat)
+        return results
+
+    def _plan(self, queryset, phase):
+        # Комментарий с фазой делает текст запроса уникальным: иначе sqlite3
+        # может вернуть план из кэша подготовленных выражений
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql} /* {phase} */', params)
+            return ' | '.join(str(row[-1]) for row in cursor.fetchall())
+
+    def _drop_indexes(self):
+        # DDL внутри транзакции: индексы вернутся вместе с откатом
+        with connection.cursor() as cursor:
+            for model in (Product, Order, Profile):
+                for index in model._meta.indexes:
+                    cursor.execute(f'DROP INDEX {connection.ops.quote_name(index.name)}')
+
+    def _seed(self, product_count, order_count):
+        self.stdout.write(f'Генерация {product_count} товаров и {order_count} заказов...')
+        rnd = random.Random(42)
+        category = Category.objects.create(name='bench-category')
+        manufacturer = Manufacturer.objects.create(name='bench-manufacturer')
+        supplier = Supplier.objects.create(name='bench-supplier')
+        Product.objects.bulk_create((
+            Product(article=f'BENCH{i}', name=f'Товар {rnd.randrange(10 ** 6):06d}', unit='шт.',
+                    price=Decimal(rnd.randrange(100, 100000)), discount=rnd.randrange(0, 40),
+                    quantity_in_stock=rnd.randrange(0, 500), category=category,
+                    manufacturer=manufacturer, supplier=supplier)
+            for i in range(product_count)
+        ), batch_size=5000)
+
+        users = User.objects.bulk_create(
+            [User(username=f'bench{i}@example.com') for i in range(1000)], batch_size=1000)
+        roles = ['client'] * 8 + ['manager', 'admin']
+        profiles = Profile.objects.bulk_create(
+            [Profile(user=user, full_name=f'Клиент {i}', role=roles[i % len(roles)])
+             for i, user in enumerate(users)], batch_size=1000)
+        clients = [profile for profile in profiles if profile.role == 'client']
+        pickup_point = PickupPoint.objects.create(address='bench-address')
+        start = date(2020, 1, 1)
+        Order.objects.bulk_create((
+            Order(order_number=10 ** 8 + i, order_date=start + timedelta(days=rnd.randrange(2000)),
+                  delivery_date=start, pickup_point=pickup_point, client=rnd.choice(clients),
+                  pickup_code=str(i))
+            for i in range(order_count)
+        ), batch_size=5000)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
@@ -0,0 +1,105 @@
+"""
+Замер и проверка движка замен generate_variant.
+Использование: python manage.py benchmark_substitutions [--repeat N]
+
+Каждый набор замен каждого варианта применяется ко всем текстовым файлам
+проекта двумя способами: прежним (последовательные str.replace по ключам)
+и одним проходом Substitution. Затем проверяется, что результат
+Substitution не зависит от порядка ключей.
+"""
+import random
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from pathlib import Path
+
+from .generate_variant import (MAX_VARIANT, REPLACEMENTS, Command as GenerateCommand, Substitution,
+                               project_files)
+
+
+def _sequential(content, replacements):
+    """Прежний способ: по проходу по тексту на каждый ключ"""
+    for old, new in replacements.items():
+        content = content.replace(old, new)
+    return content
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает скорость движка замен вариантов с последовательными str.replace и проверяет детерминизм'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Повторов замера (берётся лучший результат)'
+        )
+        parser.add_argument(
+            '--shuffles',
+            type=int,
+            default=5,
+            help='Сколько раз перемешать ключи при проверке детерминизма'
+        )
+
+    def handle(self, *args, **options):
+        base_dir = Path(settings.BASE_DIR)
+        texts = {}
+        for rel in project_files(base_dir):
+            try:
+                texts[rel] = (base_dir / rel).read_text(encoding='utf-8')
+            except (OSError, UnicodeDecodeError):
+                continue
+        generator = GenerateCommand()
+        variants = {}
+        for number in range(1, MAX_VARIANT + 1):
+            try:
+                variants[number] = generator.get_variant(number)
+            except ValueError:
+                continue
+        size = sum(len(text) for text in texts.values())
+        self.stdout.write(f'Файлов: {len(texts)} ({size / 1e6:.1f} млн символов), '
+                          f'вариантов: {len(variants)}, наборов замен: {len(REPLACEMENTS)}')
+
+        rule_sets = [replacements(variant) for variant in variants.values()
+                     for replacements in REPLACEMENTS.values()]
+
+        best_sequential = best_single = None
+        for _ in range(options['repeat']):
+            started = time.perf_counter()
+            for replacements in rule_sets:
+                for text in texts.values():
+                    _sequential(text, replacements)
+            elapsed = time.perf_counter() - started
+            best_sequential = elapsed if best_sequential is None else min(best_sequential, elapsed)
+
+            started = time.perf_counter()
+            for replacements in rule_sets:
+                substitution = Substitution(replacements)
+                for text in texts.values():
+                    substitution(text)
+            elapsed = time.perf_counter() - started
+            best_single = elapsed if best_single is None else min(best_single, elapsed)
+
+        self.stdout.write(f'  str.replace по ключам:  {best_sequential * 1000:8.1f} мс')
+        self.stdout.write(f'  Substitution, 1 проход: {best_single * 1000:8.1f} мс '
+                          f'(с компиляцией; время относительно str.replace: '
+                          f'{best_single / best_sequential:.2f})')
+
+        # Детерминизм: порядок ключей не влияет на результат
+        rng = random.Random(0)
+        differs = 0
+        for replacements in rule_sets:
+            expected = {rel: Substitution(replacements)(text) for rel, text in texts.items()}
+            for _ in range(options['shuffles']):
+                keys = list(replacements)
+                rng.shuffle(keys)
+                substitution = Substitution({key: replacements[key] for key in keys})
+                for rel, text in texts.items():
+                    if substitution(text) != expected[rel]:
+                        raise CommandError(f'Результат замен в {rel} зависит от порядка ключей')
+            # Для сравнения: сколько файлов прежний способ переписывал иначе
+            differs += sum(_sequential(text, replacements) != expected[rel]
+                           for rel, text in texts.items())
+
+        self.stdout.write(f'Файлов, где str.replace по ключам давал другой результат: {differs}')
+        self.stdout.write(self.style.SUCCESS('Результат замен не зависит от порядка ключей'))
@@ -0,0 +1,90 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.template import Context, Engine
+from django.template.backends.django import get_installed_libraries
+
+from main.models import Category, Product
+from main.roles import Role
+
+TABLE_TEMPLATE = 'main/partials/product_table.html'
+PAGE_TEMPLATES = ('main/base.html', 'main/product_list.html', TABLE_TEMPLATE,
+                  'main/partials/product_rows.html')
+
+
+def _engine(debug, cached):
+    loaders = ['django.template.loaders.app_directories.Loader']
+    if cached:
+        loaders = [('django.template.loaders.cached.Loader', loaders)]
+    return Engine(loaders=loaders, debug=debug, libraries=get_installed_libraries())
+
+
+def _products(count):
+    """Товары в памяти, без базы: замеряется только шаблон."""
+    categories = [Category(id=i, name=f'Категория {i}') for i in range(10)]
+    products = []
+    for i in range(1, count + 1):
+        product = Product(
+            id=i, article=f'A{i:06d}', name=f'Велосипед тестовый модель {i} с длинным названием',
+            price=Decimal(1000 + i % 5000), discount=i % 30, quantity_in_stock=i % 7,
+            photo=f'products/{i % 10 + 1}.jpg' if i % 4 else '',
+        )
+        product.category = categories[i % 10]
+        product.effective_price = product.discounted_price()
+        products.append(product)
+    return products
+
+
+class Command(BaseCommand):
+    help = ('Замеряет разбор шаблонов каталога и рендер таблицы товаров '
+            'на N строк: общее время и стоимость одной строки')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            nargs='+',
+            default=[1000, 10000],
+            help='Размеры таблицы в строках'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Повторов рендера (берётся лучший результат)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Разбор шаблонов страницы каталога:')
+        for debug in (True, False):
+            for cached in (False, True):
+                engine = _engine(debug, cached)
+                for name in PAGE_TEMPLATES:
+                    engine.get_template(name)
+                started = time.perf_counter()
+                for name in PAGE_TEMPLATES:
+                    engine.get_template(name)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f'  debug={debug!s:5} cached={cached!s:5} '
+                                  f'{elapsed * 1000:8.2f} мс на {len(PAGE_TEMPLATES)} шаблона')
+
+        self.stdout.write('Рендер таблицы товаров (кэшированный загрузчик):')
+        for rows in options['rows']:
+            products = _products(rows)
+            for debug in (True, False):
+                template = _engine(debug, cached=True).get_template(TABLE_TEMPLATE)
+                for role in ('admin', 'client'):
+                    context = {'products': products, 'next_cursor': None, 'role': Role(role)}
+                    best = None
+                    for _ in range(options['repeat']):
+                        started = time.perf_counter()
+                        template.render(Context(context))
+                        elapsed = time.perf_counter() - started
+                        best = elapsed if best is None else min(best, elapsed)
+                    self.stdout.write(
+                        f'  {rows:6} строк  debug={debug!s:5} роль={role:6} '
+                        f'{best * 1000:9.1f} мс  {best / rows * 1e6:7.1f} мкс/строка'
+                    )
+
+        self.stdout.write(self.style.SUCCESS('Готово'))
@@ -0,0 +1,66 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main.export import (CHUNK_SIZE, COMPRESSIONS, EXPORTS, FORMATS, export_filename,
+                         stream_export, write_xlsx)
+
+
+class Command(BaseCommand):
+    help = ('Выгружает товары, заказы или позиции заказов в CSV, JSON Lines или XLSX '
+            'потоково, в постоянном объёме памяти')
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=list(EXPORTS), help='Что выгружать')
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            default='csv',
+            help='Формат файла (по умолчанию csv)'
+        )
+        parser.add_argument(
+            '--compress',
+            choices=COMPRESSIONS,
+            default=None,
+            help='Сжать выгрузку csv/jsonl: gzip или zstd (нужен пакет zstandard)'
+        )
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='Файл выгрузки (по умолчанию <name>.<формат>[.gz|.zst] в текущем каталоге)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help=f'Строк, читаемых из базы за раз (по умолчанию {CHUNK_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        name, fmt, compression = options['name'], options['format'], options['compress']
+        if fmt == 'xlsx' and compression:
+            raise CommandError('XLSX уже сжат, --compress для него не нужен')
+        output = options['output'] or export_filename(name, fmt, compression)
+
+        started = time.perf_counter()
+        # Пишем во временный файл, чтобы прерванная выгрузка не подменила прошлую
+        tmp_path = f'{output}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                if fmt == 'xlsx':
+                    write_xlsx(name, f, options['chunk_size'])
+                else:
+                    for chunk in stream_export(name, fmt, compression, options['chunk_size']):
+                        f.write(chunk)
+            os.replace(tmp_path, output)
+        except ValueError as e:
+            raise CommandError(str(e))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        size = os.path.getsize(output)
+        self.stdout.write(self.style.SUCCESS(
+            f'Выгрузка {name} записана в {output}: {size / 1e6:.1f} МБ '
+            f'за {time.perf_counter() - started:.1f} с'))
@@ -0,0 +1,691 @@
+"""
+Команда для генерации варианта проекта для студента.
+Использование:
+    python manage.py generate_variant <номер_варианта>
+    python manage.py generate_variant --all
+    python manage.py generate_variant --range 1-10 --workers 4
+
+Повторная генерация инкрементальна: в каталоге варианта хранится манифест
+хешей, и файл пересоздаётся, только если изменилось его содержимое в
+проекте или конфигурация варианта. Файлы, которые вариант не меняет, не
+копируются, а клонируются (reflink) или, по желанию, связываются жёсткой
+ссылкой.
+
+С --archive zip (или tar.zst, если установлен zstandard) вариант не
+раскладывается по файлам, а сразу пишется в архив variant_<номер>.zip:
+неизменённые файлы читаются прямо из проекта, переписанные — из памяти.
+"""
+import datetime
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import tarfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from pathlib import Path
+import sys
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Приложение проекта и его шаблоны, в которых выполняются замены
+APP_DIR = 'main'
+TEMPLATES_DIR = f'{APP_DIR}/templates'
+
+MAX_VARIANT = 30
+
+EXCLUDE_DIRS = {
+    '__pycache__', '.git', 'venv', 'env', 'ENV',
+    'media', 'staticfiles', '.vscode', '.idea',
+    'cache',  # файловый кэш (CACHE_DIR), если его положили в проект
+    'migrations',  # не копируем миграции, они создадутся заново
+}
+EXCLUDE_FILES = {
+    '.pyc', '.pyo', '.pyd', '.db', '.sqlite3',
+    '.log', '.pid', '.bak', '.swp', '.swo',
+    'generate_variant.py',  # не копируем сам себя
+    'benchmark_substitutions.py',
+    'tests_generate_variant.py',  # тесты генератора: в варианте его нет
+}
+
+MANIFEST_NAME = '.variant_manifest.json'
+
+# Способы переноса неизменённых файлов
+LINK_MODES = ('reflink', 'hardlink', 'copy')
+
+# ioctl FICLONE: копия с общими блоками на btrfs/xfs
+FICLONE = 0x40049409
+
+ARCHIVE_FORMATS = ('zip', 'tar.zst')
+
+# Уже сжатые файлы кладутся в zip без повторного сжатия
+STORED_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.xlsx', '.zip', '.gz')
+
+
+def project_files(source):
+    """Относительные пути (через /) файлов проекта, входящих в вариант."""
+    for root, dirs, files in os.walk(source):
+        # Фильтруем директории
+        dirs[:] = sorted(d for d in dirs if d not in EXCLUDE_DIRS)
+        rel_dir = os.path.relpath(root, source)
+        for file in sorted(files):
+            # Расширение или точное совпадение имени
+            if file in EXCLUDE_FILES or any(file.endswith(ext) for ext in EXCLUDE_FILES):
+                continue
+            rel = file if rel_dir == '.' else os.path.join(rel_dir, file)
+            yield rel.replace(os.sep, '/')
+
+
+def _python_replacements(variant):
+    """
+    Замены в модулях приложения.
+
+    Имя модели заменяется как идентификатор целиком (по границе слова) во
+    всех модулях: в объявлении класса, внешних ключах, импортах и запросах.
+    Иначе вариант не запустится — например, models.ForeignKey(Category, ...)
+    или from .models import Product остались бы со старыми именами.
+    Производные имена (ProductForm, ProductQuerySet) не меняются.
+    """
+    return {
+        'Product': variant['main_model'],
+        'Category': variant['category_model'],
+        'Manufacturer': variant['manufacturer_model'],
+        'Brand': variant['manufacturer_model'],
+        'Supplier': variant['supplier_model'],
+        'Unit': variant['unit_model'],
+
+        # Verbose names
+        'verbose_name="Товар"': f'verbose_name="{variant["main_model_verbose"]}"',
+        'verbose_name_plural="Товары"': f'verbose_name_plural="{variant["main_model_plural"]}"',
+        'verbose_name="Категория"': f'verbose_name="{variant["category_verbose"]}"',
+        'verbose_name_plural="Категории"': f'verbose_name_plural="{variant["category_plural"]}"',
+        'verbose_name="Бренд"': f'verbose_name="{variant["manufacturer_verbose"]}"',
+        'verbose_name_plural="Бренды"': f'verbose_name_plural="{variant["manufacturer_plural"]}"',
+        'verbose_name="Поставщик"': f'verbose_name="{variant["supplier_verbose"]}"',
+        'verbose_name_plural="Поставщики"': f'verbose_name_plural="{variant["supplier_plural"]}"',
+    }
+
+
+def _templates_replacements(variant):
+    """Замены в HTML-шаблонах"""
+    return {
+        'Магазин обуви': variant['site_name'],
+        'Система управления товарами': variant['site_title'],
+        'Товары': variant['nav_products'],
+        'Заказы': variant['nav_orders'],
+        'Список товаров': variant['page_title_list'],
+        'Добавить товар': variant['button_add'],
+    }
+
+
+REPLACEMENTS = {
+    'python': _python_replacements,
+    'templates': _templates_replacements,
+}
+
+
+class Substitution:
+    """
+    Набор замен, применяемый за один проход по тексту.
+
+    Все ключи собираются в одно регулярное выражение, более длинные ключи
+    идут первыми: из 'Product' и 'Product.' в позиции 'Product.objects'
+    выбирается 'Product.'. Результат не зависит от порядка ключей, а
+    подставленный текст повторно не заменяется. Ключ, начинающийся или
+    заканчивающийся буквой, цифрой или _, совпадает только по границе
+    слова: 'Product' не заменяется внутри 'ProductForm'.
+    """
+
+    def __init__(self, replacements):
+        self.replacements = dict(replacements)
+        keys = sorted(self.replacements, key=lambda key: (-len(key), key))
+        self.pattern = re.compile('|'.join(map(self._bounded, keys))) if keys else None
+
+    @staticmethod
+    def _bounded(key):
+        pattern = re.escape(key)
+        if re.match(r'\w', key):
+            # Проверка границы после первого символа, а не перед ним: тогда
+            # выражение начинается с литерала и re ищет кандидатов по первым
+            # символам ключей, а не пробует все ключи в каждой позиции
+            pattern = re.escape(key[0]) + r'(?<!\w.)' + re.escape(key[1:])
+        if re.search(r'\w$', key):
+            pattern += r'(?!\w)'
+        return pattern
+
+    def __call__(self, content):
+        if self.pattern is None:
+            return content
+        return self.pattern.sub(lambda match: self.replacements[match.group()], content)
+
+
+def variant_substitutions(variant):
+    """Скомпилированные замены варианта: имя правила -> Substitution."""
+    return {name: Substitution(replacements(variant)) for name, replacements in REPLACEMENTS.items()}
+
+
+def transformer(rel):
+    """Имя правила замен для файла или None, если файл переносится как есть."""
+    if rel.startswith(f'{APP_DIR}/') and rel.endswith('.py'):
+        return 'python'
+    if rel.startswith(f'{TEMPLATES_DIR}/') and rel.endswith('.html'):
+        return 'templates'
+    return None
+
+
+def config_hash(variant):
+    """
+    Хеш конфигурации варианта вместе с кодом генератора.
+
+    Изменение правил замен в этом файле тоже делает устаревшими все
+    переписанные файлы.
+    """
+    digest = hashlib.sha1(Path(__file__).read_bytes())
+    digest.update(json.dumps(variant, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _remove(path):
+    # Файл может быть жёсткой ссылкой на исходник: его нельзя перезаписывать на месте
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _reflink(src, dst):
+    if fcntl is None:
+        raise OSError('reflink недоступен')
+    with open(src, 'rb') as s, open(dst, 'wb') as d:
+        fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+    shutil.copystat(src, dst)
+
+
+def link_file(src, dst, mode):
+    """
+    Переносит неизменённый файл: клонирует, связывает или копирует.
+
+    Если файловая система не умеет клонировать (или ссылка ведёт на другой
+    диск), файл копируется. Возвращает фактически использованный способ.
+    """
+    _remove(dst)
+    if mode == 'reflink':
+        try:
+            _reflink(src, dst)
+            return 'reflink'
+        except OSError:
+            _remove(dst)
+    elif mode == 'hardlink':
+        try:
+            os.link(src, dst)
+            return 'hardlink'
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
+    return 'copy'
+
+
+def write_file(path, data):
+    """Записывает файл через временный, не затрагивая возможную жёсткую ссылку."""
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def generate_variant(variant_number, variant, source, destination, link_mode='reflink', clean=False):
+    """
+    Создаёт или обновляет каталог варианта.
+
+    Выполняется и в дочерних процессах пакетного режима, поэтому ничего не
+    выводит, а возвращает статистику и предупреждения.
+    """
+    source, destination = Path(source), Path(destination)
+    stats = _new_stats(variant_number, destination)
+    if clean and destination.exists():
+        shutil.rmtree(destination)
+    destination.mkdir(parents=True, exist_ok=True)
+
+    manifest_path = destination / MANIFEST_NAME
+    old_manifest = {}
+    if manifest_path.exists():
+        try:
+            old_manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+        except ValueError:
+            stats['warnings'].append('Манифест повреждён, вариант пересоздаётся целиком')
+    variant_hash = config_hash(variant)
+    substitutions = variant_substitutions(variant)
+    manifest = {}
+
+    for rel in project_files(source):
+        src_file = source / rel
+        dst_file = destination / rel
+        try:
+            data = src_file.read_bytes()
+        except OSError as e:
+            stats['warnings'].append(f'Не удалось прочитать {rel}: {e}')
+            continue
+        stats['files'] += 1
+        rule = transformer(rel)
+        key = hashlib.sha1(data).hexdigest()
+        if rule is not None:
+            key = f'{key}:{variant_hash}'
+        manifest[rel] = key
+        if old_manifest.get(rel) == key and dst_file.exists():
+            stats['unchanged'] += 1
+            continue
+
+        dst_file.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            if rule is None:
+                link_file(src_file, dst_file, link_mode)
+                stats['linked'] += 1
+            else:
+                _remove(dst_file)
+                write_file(dst_file, substitutions[rule](data.decode('utf-8')).encode('utf-8'))
+                stats['rewritten'] += 1
+        except (OSError, UnicodeDecodeError) as e:
+            manifest.pop(rel)
+            stats['warnings'].append(f'Не удалось обработать {rel}: {e}')
+
+    # Файлы, исчезнувшие из проекта с прошлой генерации
+    for rel in old_manifest.keys() - manifest.keys():
+        _remove(destination / rel)
+        stats['removed'] += 1
+
+    # Пустой __init__.py в migrations, миграции создадутся заново
+    migrations_dir = destination / APP_DIR / 'migrations'
+    migrations_dir.mkdir(parents=True, exist_ok=True)
+    (migrations_dir / '__init__.py').touch()
+
+    (destination / 'VARIANT_INFO.txt').write_text(_variant_info(variant, variant_number),
+                                                  encoding='utf-8')
+    (destination / 'GENERATION_REPORT.txt').write_text(_generation_report(variant_number, stats),
+                                                       encoding='utf-8')
+    write_file(manifest_path, json.dumps(manifest, indent=1, sort_keys=True).encode('utf-8'))
+    return stats
+
+
+class _ZipWriter:
+    def __init__(self, fileobj):
+        self.archive = zipfile.ZipFile(fileobj, 'w', zipfile.ZIP_DEFLATED)
+
+    def add_file(self, src, name):
+        compress_type = (zipfile.ZIP_STORED if name.lower().endswith(STORED_EXTENSIONS)
+                         else zipfile.ZIP_DEFLATED)
+        self.archive.write(src, name, compress_type=compress_type)
+
+    def add_bytes(self, name, data, mtime):
+        info = zipfile.ZipInfo(name, time.localtime(mtime)[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info.external_attr = 0o644 << 16
+        self.archive.writestr(info, data)
+
+    def close(self):
+        self.archive.close()
+
+
+class _TarZstWriter:
+    def __init__(self, fileobj):
+        self.stream = zstandard.ZstdCompressor().stream_writer(fileobj)
+        # 'w|' — потоковая запись, без перемотки назад
+        self.archive = tarfile.open(fileobj=self.stream, mode='w|')
+
+    def add_file(self, src, name):
+        self.archive.add(src, name, recursive=False)
+
+    def add_bytes(self, name, data, mtime):
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = mtime
+        info.mode = 0o644
+        self.archive.addfile(info, io.BytesIO(data))
+
+    def close(self):
+        self.archive.close()
+        self.stream.flush(zstandard.FLUSH_FRAME)
+
+
+def build_archive(variant_number, variant, source, fileobj, fmt='zip'):
+    """
+    Записывает вариант в архив fileobj (открытый файл или io.BytesIO).
+
+    Файлы варианта на диске не создаются: неизменённые файлы архив читает
+    из проекта, переписанные добавляются из памяти. Все пути в архиве
+    начинаются с variant_<номер>/.
+    """
+    source = Path(source)
+    prefix = f'variant_{variant_number:02d}/'
+    stats = _new_stats(variant_number, None)
+    substitutions = variant_substitutions(variant)
+    writer = _ZipWriter(fileobj) if fmt == 'zip' else _TarZstWriter(fileobj)
+    try:
+        for rel in project_files(source):
+            src_file = source / rel
+            rule = transformer(rel)
+            try:
+                if rule is None:
+                    writer.add_file(src_file, prefix + rel)
+                    stats['linked'] += 1
+                else:
+                    content = substitutions[rule](src_file.read_text(encoding='utf-8'))
+                    writer.add_bytes(prefix + rel, content.encode('utf-8'), src_file.stat().st_mtime)
+                    stats['rewritten'] += 1
+            except (OSError, UnicodeDecodeError) as e:
+                stats['warnings'].append(f'Не удалось обработать {rel}: {e}')
+                continue
+            stats['files'] += 1
+
+        now = time.time()
+        writer.add_bytes(f'{prefix}{APP_DIR}/migrations/__init__.py', b'', now)
+        writer.add_bytes(prefix + 'VARIANT_INFO.txt',
+                         _variant_info(variant, variant_number).encode('utf-8'), now)
+        writer.add_bytes(prefix + 'GENERATION_REPORT.txt',
+                         _generation_report(variant_number, stats).encode('utf-8'), now)
+    finally:
+        writer.close()
+    return stats
+
+
+def write_archive(variant_number, variant, source, destination, fmt='zip'):
+    """Создаёт архив варианта; готовый файл появляется только целиком."""
+    tmp_path = f'{destination}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        stats = build_archive(variant_number, variant, source, f, fmt)
+    os.replace(tmp_path, destination)
+    stats['destination'] = str(destination)
+    return stats
+
+
+def _new_stats(variant_number, destination):
+    return {'variant': variant_number, 'destination': str(destination), 'files': 0,
+            'rewritten': 0, 'linked': 0, 'unchanged': 0, 'removed': 0, 'warnings': []}
+
+
+def _variant_info(variant, variant_number):
+    """Текст файла с информацией о варианте"""
+    return f"""
+
+Номер варианта: {variant_number}
+Тематика: {variant['theme']}
+Дата генерации: {datetime.datetime.now().strftime('%d.%m.%Y %H:%M')}
+
+- {variant['main_model']} ({variant['main_model_verbose']})
+- {variant['category_model']} ({variant['category_verbose']})
+- {variant['manufacturer_model']} ({variant['manufacturer_verbose']})
+- {variant['supplier_model']} ({variant['supplier_verbose']})
+
+"""
+
+
+def _generation_report(variant_number, stats):
+    """Текст отчета о генерации"""
+    return f"""ОТЧЕТ О ГЕНЕРАЦИИ ВАРИАНТА
+
+Вариант: {variant_number}
+Время генерации: {datetime.datetime.now().strftime('%d.%m.%Y %H:%M:%S')}
+Файлов в варианте: {stats['files']}
+Переписано: {stats['rewritten']}
+Перенесено без изменений: {stats['linked']}
+Не изменилось с прошлой генерации: {stats['unchanged']}
+Удалено устаревших: {stats['removed']}
+
+"""
+
+
+def parse_range(value):
+    """'3-7' -> [3, 4, 5, 6, 7]"""
+    try:
+        first, _, last = value.partition('-')
+        first, last = int(first), int(last or first)
+    except ValueError:
+        raise CommandError(f'Неверный диапазон вариантов: {value} (ожидается, например, 1-10)')
+    if first > last:
+        raise CommandError(f'Неверный диапазон вариантов: {value}')
+    return list(range(first, last + 1))
+
+
+class Command(BaseCommand):
+    help = 'Генерирует вариант проекта для студента (или сразу несколько вариантов)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'variant_number',
+            type=int,
+            nargs='?',
+            help=f'Номер варианта (1-{MAX_VARIANT})'
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Сгенерировать все варианты, для которых есть конфигурация'
+        )
+        parser.add_argument(
+            '--range',
+            type=str,
+            default=None,
+            help='Диапазон номеров вариантов, например 1-10'
+        )
+        parser.add_argument(
+            '--output-dir',
+            type=str,
+            default=None,
+            help='Директория для вывода (по умолчанию: variant_<номер>); '
+                 'в пакетном режиме — директория, в которой создаются variant_<номер>'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Число процессов в пакетном режиме (по умолчанию — число ядер)'
+        )
+        parser.add_argument(
+            '--link',
+            choices=LINK_MODES,
+            default='reflink',
+            help='Как переносить неизменённые файлы: reflink (клон, при невозможности — копия), '
+                 'hardlink (жёсткая ссылка: правка файла в варианте изменит исходник!) или copy'
+        )
+        parser.add_argument(
+            '--clean',
+            action='store_true',
+            help='Удалить каталог варианта и сгенерировать его заново, без манифеста'
+        )
+        parser.add_argument(
+            '--archive',
+            choices=ARCHIVE_FORMATS,
+            default=None,
+            help='Записать вариант сразу в архив variant_<номер>.zip или .tar.zst '
+                 '(нужен пакет zstandard) вместо каталога'
+        )
+
+    def handle(self, *args, **options):
+        base_dir = Path(settings.BASE_DIR)  # exam_example/
+        numbers = self.get_variant_numbers(options)
+        batch = len(numbers) > 1 or options['all'] or options['range']
+
+        # Получаем конфигурацию вариантов
+        variants = {}
+        for number in numbers:
+            try:
+                variants[number] = self.get_variant(number)
+            except ValueError as e:
+                if not options['all']:
+                    raise CommandError(str(e))
+            except ImportError as e:
+                raise CommandError(f'Ошибка импорта конфигурации: {e}')
+        if not variants:
+            raise CommandError('Нет ни одной конфигурации варианта')
+        archive = options['archive']
+        if archive == 'tar.zst' and zstandard is None:
+            raise CommandError('Для архива tar.zst нужен пакет zstandard (pip install zstandard)')
+
+        jobs = []
+        for number, variant in variants.items():
+            if batch:
+                output_dir = Path(options['output_dir'] or '') / f'variant_{number:02d}'
+            else:
+                output_dir = Path(options['output_dir'] or f'variant_{number:02d}')
+            output_path = base_dir.parent / output_dir
+            if archive:
+                output_path.parent.mkdir(parents=True, exist_ok=True)
+                jobs.append((number, variant, str(base_dir), f'{output_path}.{archive}', archive))
+            else:
+                jobs.append((number, variant, str(base_dir), str(output_path),
+                             options['link'], options['clean']))
+            self.stdout.write(self.style.SUCCESS(f'Генерация варианта {number}: {variant["theme"]}'))
+
+        generate = write_archive if archive else generate_variant
+        try:
+            if len(jobs) > 1:
+                with ProcessPoolExecutor(options['workers']) as executor:
+                    results = list(executor.map(generate, *zip(*jobs)))
+            else:
+                results = [generate(*jobs[0])]
+        except PermissionError as e:
+            raise CommandError(f'Нет прав на запись в каталог варианта: {e}')
+
+        for stats in results:
+            for warning in stats['warnings']:
+                self.stdout.write(self.style.WARNING(f'Вариант {stats["variant"]}: {warning}'))
+            self.stdout.write(
+                f'Вариант {stats["variant"]:2}: {stats["destination"]} — файлов {stats["files"]}, '
+                f'переписано {stats["rewritten"]}, перенесено {stats["linked"]}, '
+                f'без изменений {stats["unchanged"]}, удалено {stats["removed"]}'
+            )
+
+        if batch:
+            self.stdout.write(self.style.SUCCESS(f'\nСгенерировано вариантов: {len(results)}'))
+            return
+        if archive:
+            self.stdout.write(self.style.SUCCESS(f'\nАрхив варианта создан: {results[0]["destination"]}'))
+            return
+
+        output_dir = results[0]['destination']
+        self.stdout.write(self.style.SUCCESS(f'\nВариант успешно создан в директории: {output_dir}'))
+        self.stdout.write(f'Тематика: {variants[numbers[0]]["theme"]}')
+        self.stdout.write(f'\nСледующие шаги:')
+        self.stdout.write(f'   1. cd {output_dir}')
+        self.stdout.write(f'   2. python -m venv venv')
+        self.stdout.write(f'   3. source venv/bin/activate  # или venv\\Scripts\\activate для Windows')
+        self.stdout.write(f'   4. pip install -r requirements.txt')
+        self.stdout.write(f'   5. python manage.py migrate')
+        self.stdout.write(f'   6. python manage.py createsuperuser')
+        self.stdout.write(f'   7. python manage.py runserver')
+
+    def get_variant_numbers(self, options):
+        """Номера вариантов из аргументов команды"""
+        if options['all']:
+            return list(range(1, MAX_VARIANT + 1))
+        if options['range']:
+            return parse_range(options['range'])
+        if options['variant_number'] is None:
+            raise CommandError('Укажите номер варианта, --range или --all')
+        return [options['variant_number']]
+
+    def get_variant(self, variant_number):
+        """Получает конфигурацию варианта"""
+        # Пытаемся импортировать разными способами
+        try:
+            # Прямой импорт
+            from variants_config import get_variant
+            return get_variant(variant_number)
+        except ImportError:
+            try:
+                # Импорт с добавлением пути
+                sys.path.insert(0, str(settings.BASE_DIR))
+                from variants_config import get_variant
+                return get_variant(variant_number)
+            except ImportError:
+                # Если файла нет, используем встроенную конфигурацию
+                return self.get_default_variant(variant_number)
+
+    def get_default_variant(self, variant_number):
+        """Встроенная конфигурация вариантов на случай отсутствия variants_config.py"""
+        variants = {
+            1: {
+                'theme': 'Книжный магазин',
+                'main_model': 'Book',
+                'main_model_verbose': 'Книга',
+                'main_model_plural': 'Книги',
+                'category_model': 'Genre',
+                'category_verbose': 'Жанр',
+                'category_plural': 'Жанры',
+                'manufacturer_model': 'Publisher',
+                'manufacturer_verbose': 'Издательство',
+                'manufacturer_plural': 'Издательства',
+                'supplier_model': 'Supplier',
+                'supplier_verbose': 'Поставщик',
+                'supplier_plural': 'Поставщики',
+                'unit_model': 'Unit',
+                'site_name': 'Книжный магазин',
+                'site_title': 'Система управления книгами',
+                'nav_products': 'Книги',
+                'nav_orders': 'Заказы',
+                'page_title_list': 'Список книг',
+                'button_add': 'Добавить книгу',
+            },
+            2: {
+                'theme': 'Магазин электроники',
+                'main_model': 'Product',
+                'main_model_verbose': 'Товар',
+                'main_model_plural': 'Товары',
+                'category_model': 'Category',
+                'category_verbose': 'Категория',
+                'category_plural': 'Категории',
+                'manufacturer_model': 'Brand',
+                'manufacturer_verbose': 'Бренд',
+                'manufacturer_plural': 'Бренды',
+                'supplier_model': 'Supplier',
+                'supplier_verbose': 'Поставщик',
+                'supplier_plural': 'Поставщики',
+                'unit_model': 'Unit',
+                'site_name': 'Магазин электроники',
+                'site_title': 'Система управления товарами',
+                'nav_products': 'Товары',
+                'nav_orders': 'Заказы',
+                'page_title_list': 'Каталог товаров',
+                'button_add': 'Добавить товар',
+            },
+            3: {
+                'theme': 'Медицинский центр',
+                'main_model': 'Doctor',
+                'main_model_verbose': 'Врач',
+                'main_model_plural': 'Врачи',
+                'category_model': 'Specialization',
+                'category_verbose': 'Специализация',
+                'category_plural': 'Специализации',
+                'manufacturer_model': 'Clinic',
+                'manufacturer_verbose': 'Клиника',
+                'manufacturer_plural': 'Клиники',
+                'supplier_model': 'Supplier',
+                'supplier_verbose': 'Поставщик',
+                'supplier_plural': 'Поставщики',
+                'unit_model': 'Unit',
+                'site_name': 'Медицинский центр',
+                'site_title': 'Система записи к врачам',
+                'nav_products': 'Врачи',
+                'nav_orders': 'Записи',
+                'page_title_list': 'Наши врачи',
+                'button_add': 'Добавить врача',
+            },
+        }
+        
+        if variant_number not in variants:
+            available = ', '.join(str(k) for k in variants.keys())
+            raise ValueError(f'Вариант {variant_number} не найден. Доступны: {available}')
+        
+        return variants[variant_number]
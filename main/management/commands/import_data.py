@@ -1,150 +1,355 @@
 import pandas as pd
+from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
+from django.db import connections, transaction
 from main.models import (Category, Manufacturer, Supplier, Product,
-                         Profile, PickupPoint, Order, OrderItem)
+                         Profile, PickupPoint, Order, OrderItem, PhotoTask)
+from main.excel_stream import iter_row_chunks
+from main.photos import PhotoPipeline
+from main.cache import bump_catalog_version, bump_profile_version
+from main.stock import recalculate_reserved
+from main.search import rebuild_index
 from datetime import datetime
+from functools import partial
+import json
 import os
-import shutil
+import time
 from decimal import Decimal
 
+ROLE_MAP = {
+    'Администратор': 'admin',
+    'Менеджер': 'manager',
+    'Авторизированный клиент': 'client',
+}
+
+# Этапы импорта в порядке зависимостей: (этап, файл, имена колонок для файлов без заголовка)
+STAGES = [
+    ('products', 'import/Tovar.xlsx', None),
+    ('users', 'import/user_import.xlsx', None),
+    ('pickup_points', 'import/Пункты выдачи_import.xlsx', ['address']),
+    ('orders', 'import/Заказ_import.xlsx', None),
+]
+
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def parse_date(value, default):
+    if isinstance(value, str) and value == '30.02.2023':
+        return datetime(2023, 3, 2).date()
+    if isinstance(value, datetime):
+        return value.date()
+    return default
+
+
 class Command(BaseCommand):
     help = 'Импорт данных из Excel файлов'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Размер пачки для bulk_create/bulk_update (по умолчанию 1000)'
+        )
+        parser.add_argument(
+            '--stream',
+            action='store_true',
+            help='Читать файлы потоково (openpyxl read_only) и фиксировать каждую пачку отдельно'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=10000,
+            help='Строк в одной транзакции в режиме --stream (по умолчанию 10000)'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Продолжить прерванный потоковый импорт с последней зафиксированной пачки'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            type=str,
+            default='import/.import_checkpoint.json',
+            help='Файл с прогрессом потокового импорта'
+        )
+        parser.add_argument(
+            '--photo-workers',
+            type=int,
+            default=None,
+            help='Процессов для обработки фото (по умолчанию по числу ядер, 1 — без пула)'
+        )
+
     def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
         self.stdout.write('Начинаем импорт...')
 
+        self.photos = PhotoPipeline('import', settings.MEDIA_ROOT, options['photo_workers'])
+        try:
+            if options['stream']:
+                self._handle_stream(options)
+            else:
+                with transaction.atomic():
+                    self._clear()
+                    for stage, path, names in STAGES:
+                        if names:
+                            df = pd.read_excel(path, header=None, names=names)
+                        else:
+                            df = pd.read_excel(path)
+                        rows = df.to_dict('records')
+                        self._run_stage(stage, ((None, part) for part in chunked(rows, self.batch_size)))
+
+                    # bulk_create не вызывает сигналы, поэтому индекс поиска строим целиком
+                    rebuild_index()
+                    recalculate_reserved()
+        finally:
+            self.photos.close()
+        # bulk-операции не вызывают сигналы, сбрасываем кэш каталога явно
+        bump_catalog_version()
+
+        self.stdout.write(f'Фото обработано: {self.photos.processed}, '
+                          f'без изменений: {self.photos.skipped}')
+        self.stdout.write(self.style.SUCCESS('Импорт завершён'))
+
+    def _handle_stream(self, options):
+        checkpoint_path = options['checkpoint']
+        state = {}
+        if options['resume'] and os.path.exists(checkpoint_path):
+            with open(checkpoint_path, encoding='utf-8') as f:
+                state = json.load(f)
+            self.stdout.write(f'Продолжаем с позиции: {state}')
+        else:
+            with transaction.atomic():
+                self._clear()
+
+        for stage, path, names in STAGES:
+            def save_position(position, stage=stage):
+                state[stage] = position
+                with open(checkpoint_path, 'w', encoding='utf-8') as f:
+                    json.dump(state, f)
+
+            chunks = iter_row_chunks(path, options['chunk_size'], names=names,
+                                     skip=state.get(stage, 0))
+            self._run_stage(stage, chunks, on_commit=save_position)
+
+        rebuild_index()
+        recalculate_reserved()
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
+    def _run_stage(self, stage, chunks, on_commit=None):
+        """
+        Прогоняет пачки (позиция, строки) через обработчик этапа и печатает скорость.
+
+        Если задан on_commit, каждая пачка фиксируется своей транзакцией,
+        после чего on_commit получает позицию для возобновления.
+        """
+        if stage == 'orders':
+            self._prepare_orders()
+        handler = getattr(self, f'_import_{stage}')
+        started = time.monotonic()
+        total = 0
+        for position, rows in chunks:
+            if on_commit is None:
+                handler(rows)
+            else:
+                with transaction.atomic():
+                    handler(rows)
+                on_commit(position)
+            total += len(rows)
+            elapsed = time.monotonic() - started
+            self.stdout.write(f'{stage}: {total} строк, {total / max(elapsed, 1e-6):.0f} строк/с')
+
+    def _clear(self):
         OrderItem.objects.all().delete()
         Order.objects.all().delete()
-        Product.objects.all().delete()
+        PhotoTask.objects.all().delete()
+        # Без сигналов: иначе Django удаляет товары по одному ради post_delete,
+        # а индекс поиска всё равно перестраивается в конце импорта. Ссылающиеся
+        # на товары позиции и задачи фото уже удалены выше
+        connection = connections[Product.objects.db]
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {connection.ops.quote_name(Product._meta.db_table)}')
         Category.objects.all().delete()
         Manufacturer.objects.all().delete()
         Supplier.objects.all().delete()
         PickupPoint.objects.all().delete()
 
-        df_tovar = pd.read_excel('import/Tovar.xlsx')
-        categories = set(df_tovar['Категория товара'].dropna())
-        for cat in categories:
-            Category.objects.get_or_create(name=cat)
-
-        manufacturers = set(df_tovar['Производитель'].dropna())
-        for man in manufacturers:
-            Manufacturer.objects.get_or_create(name=man)
-
-        suppliers = set(df_tovar['Поставщик'].dropna())
-        for sup in suppliers:
-            Supplier.objects.get_or_create(name=sup)
-
-        os.makedirs('media/products', exist_ok=True)
-        for idx, row in df_tovar.iterrows():
-            category = Category.objects.get(name=row['Категория товара'])
-            manufacturer = Manufacturer.objects.get(name=row['Производитель'])
-            supplier = Supplier.objects.get(name=row['Поставщик'])
-
-            photo_filename = row.get('Фото', '')
-            photo_field = None
-            if photo_filename and pd.notna(photo_filename):
-                src = f'import/{photo_filename}'
-                if os.path.exists(src):
-                    dst = f'media/products/{photo_filename}'
-                    shutil.copy2(src, dst)
+    def _resolve_names(self, model, names):
+        """Создаёт недостающие записи справочника и возвращает {name: id}."""
+        names = set(names)
+        model.objects.bulk_create([model(name=name) for name in names],
+                                  batch_size=self.batch_size, ignore_conflicts=True)
+        lookup = {}
+        for part in chunked(list(names), self.batch_size):
+            lookup.update(model.objects.filter(name__in=part).values_list('name', 'id'))
+        return lookup
+
+    # ---- Товары ----
+    def _import_products(self, rows):
+        categories = self._resolve_names(
+            Category, (r['Категория товара'] for r in rows if pd.notna(r['Категория товара'])))
+        manufacturers = self._resolve_names(
+            Manufacturer, (r['Производитель'] for r in rows if pd.notna(r['Производитель'])))
+        suppliers = self._resolve_names(
+            Supplier, (r['Поставщик'] for r in rows if pd.notna(r['Поставщик'])))
+
+        for part in chunked(rows, self.batch_size):
+            articles = [row['Артикул'] for row in part]
+            existing = set(Product.objects.filter(article__in=articles)
+                           .values_list('article', flat=True))
+            # Копирование и масштабирование фото всей пачки — в пуле процессов
+            photos = self.photos.process(
+                row['Фото'] for row in part
+                if row.get('Фото') and pd.notna(row['Фото']) and row['Артикул'] not in existing
+            )
+            new_products = {}
+            for row in part:
+                article = row['Артикул']
+                if article in existing or article in new_products:
+                    continue
+
+                photo_filename = row.get('Фото', '')
+                photo_field = None
+                if photo_filename in photos:
                     photo_field = f'products/{photo_filename}'
 
-            Product.objects.get_or_create(
-                article=row['Артикул'],
-                defaults={
-                    'name': row['Наименование товара'],
-                    'unit': row['Единица измерения'],
-                    'price': Decimal(str(row['Цена'])),
-                    'supplier': supplier,
-                    'manufacturer': manufacturer,
-                    'category': category,
-                    'discount': int(row['Действующая скидка']) if pd.notna(row['Действующая скидка']) else 0,
-                    'quantity_in_stock': int(row['Кол-во на складе']) if pd.notna(row['Кол-во на складе']) else 0,
-                    'description': row['Описание товара'] if pd.notna(row['Описание товара']) else '',
-                    'photo': photo_field,
-                }
+                new_products[article] = Product(
+                    article=article,
+                    name=row['Наименование товара'],
+                    unit=row['Единица измерения'],
+                    price=Decimal(str(row['Цена'])),
+                    supplier_id=suppliers[row['Поставщик']],
+                    manufacturer_id=manufacturers[row['Производитель']],
+                    category_id=categories[row['Категория товара']],
+                    discount=int(row['Действующая скидка']) if pd.notna(row['Действующая скидка']) else 0,
+                    quantity_in_stock=int(row['Кол-во на складе']) if pd.notna(row['Кол-во на складе']) else 0,
+                    description=row['Описание товара'] if pd.notna(row['Описание товара']) else '',
+                    photo=photo_field,
+                )
+            Product.objects.bulk_create(new_products.values(), batch_size=self.batch_size)
+
+    # ---- Пользователи ----
+    def _import_users(self, rows):
+        for part in chunked(rows, self.batch_size):
+            users = {row['Логин']: row for row in part}
+            existing = User.objects.in_bulk(list(users), field_name='username')
+            User.objects.bulk_create(
+                [User(username=email, email=email, password=make_password(row['Пароль']))
+                 for email, row in users.items() if email not in existing],
+                batch_size=self.batch_size,
             )
+            user_ids = dict(User.objects.filter(username__in=list(users))
+                            .values_list('username', 'id'))
+            profiles = {profile.user_id: profile for profile in
+                        Profile.objects.filter(user_id__in=list(user_ids.values()))}
 
-        df_users = pd.read_excel('import/user_import.xlsx')
-        for idx, row in df_users.iterrows():
-            email = row['Логин']
-            password = row['Пароль']
-            full_name = row['ФИО']
-            role_map = {
-                'Администратор': 'admin',
-                'Менеджер': 'manager',
-                'Авторизированный клиент': 'client',
-            }
-            role = role_map.get(row['Роль сотрудника'], 'client')
-            user, created = User.objects.get_or_create(username=email, defaults={'email': email})
-            if created:
-                user.set_password(password)
-                user.save()
-            Profile.objects.update_or_create(user=user, defaults={'full_name': full_name, 'role': role})
-
-        df_pickup = pd.read_excel('import/Пункты выдачи_import.xlsx', header=None, names=['address'])
-        for addr in df_pickup['address']:
-            PickupPoint.objects.get_or_create(address=addr)
-
-        df_orders = pd.read_excel('import/Заказ_import.xlsx')
-        for idx, row in df_orders.iterrows():
-            items_str = row['Артикул заказа']
-            items_list = []
-            parts = [p.strip() for p in items_str.split(',')]
-            for i in range(0, len(parts), 2):
-                article = parts[i]
-                qty = int(parts[i+1])
-                try:
-                    product = Product.objects.get(article=article)
-                    items_list.append((product, qty))
-                except Product.DoesNotExist:
-                    continue
+            to_create, to_update = [], []
+            for email, row in users.items():
+                user_id = user_ids[email]
+                full_name = row['ФИО']
+                role = ROLE_MAP.get(row['Роль сотрудника'], 'client')
+                if user_id in profiles:
+                    profile = profiles[user_id]
+                    profile.full_name, profile.role = full_name, role
+                    to_update.append(profile)
+                else:
+                    to_create.append(Profile(user_id=user_id, full_name=full_name, role=role))
+            Profile.objects.bulk_create(to_create, batch_size=self.batch_size)
+            Profile.objects.bulk_update(to_update, ['full_name', 'role'], batch_size=self.batch_size)
+            # bulk_update не шлёт post_save: сбрасываем закешированные роли сами, после фиксации пачки
+            transaction.on_commit(partial(self._bump_profiles, [p.user_id for p in to_update]))
+
+    @staticmethod
+    def _bump_profiles(user_ids):
+        for user_id in user_ids:
+            bump_profile_version(user_id)
 
-            if not items_list:
-                continue
+    # ---- Пункты выдачи ----
+    def _import_pickup_points(self, rows):
+        addresses = (row['address'] for row in rows if pd.notna(row['address']))
+        PickupPoint.objects.bulk_create(
+            [PickupPoint(address=addr) for addr in dict.fromkeys(addresses)],
+            batch_size=self.batch_size, ignore_conflicts=True,
+        )
 
-            try:
-                client_profile = Profile.objects.get(full_name=row['ФИО авторизированного клиента'], role='client')
-            except Profile.DoesNotExist:
-                client_profile = Profile.objects.filter(role='client').first()
-                if not client_profile:
+    # ---- Заказы ----
+    def _prepare_orders(self):
+        """Справочники клиентов и пунктов выдачи загружаются один раз на этап."""
+        self.clients = {}
+        for full_name, profile_id in (Profile.objects.filter(role='client')
+                                      .order_by('-id').values_list('full_name', 'id')):
+            self.clients[full_name] = profile_id
+        self.default_client = Profile.objects.filter(role='client').values_list('id', flat=True).first()
+        self.pickup_points = set(PickupPoint.objects.values_list('id', flat=True))
+        self.default_pickup_point = PickupPoint.objects.values_list('id', flat=True).first()
+
+    def _import_orders(self, rows):
+        clients, default_client = self.clients, self.default_client
+        pickup_points, default_pickup_point = self.pickup_points, self.default_pickup_point
+
+        for part in chunked(rows, self.batch_size):
+            parsed = []
+            articles = set()
+            for row in part:
+                parts = [p.strip() for p in row['Артикул заказа'].split(',')]
+                items = [(parts[i], int(parts[i + 1])) for i in range(0, len(parts), 2)]
+                articles.update(article for article, qty in items)
+                parsed.append((row, items))
+            products = dict(Product.objects.filter(article__in=articles)
+                            .values_list('article', 'id'))
+
+            orders = {}
+            order_items = {}
+            for row, items in parsed:
+                items_list = [(products[article], qty) for article, qty in items
+                              if article in products]
+                if not items_list:
                     continue
 
-            pickup_point_id = int(row['Адрес пункта выдачи'])
-            try:
-                pickup_point = PickupPoint.objects.get(id=pickup_point_id)
-            except PickupPoint.DoesNotExist:
-                pickup_point = PickupPoint.objects.first()
-                if not pickup_point:
+                client_id = clients.get(row['ФИО авторизированного клиента'], default_client)
+                if client_id is None:
                     continue
 
-            order_date = row['Дата заказа']
-            if isinstance(order_date, str) and order_date == '30.02.2023':
-                order_date = datetime(2023, 3, 2).date()
-            elif isinstance(order_date, datetime):
-                order_date = order_date.date()
-            else:
-                order_date = datetime.now().date()
+                pickup_point_id = int(row['Адрес пункта выдачи'])
+                if pickup_point_id not in pickup_points:
+                    pickup_point_id = default_pickup_point
+                    if pickup_point_id is None:
+                        continue
 
-            delivery_date = row['Дата доставки']
-            if isinstance(delivery_date, datetime):
-                delivery_date = delivery_date.date()
-            else:
-                delivery_date = order_date
-
-            order, created = Order.objects.get_or_create(
-                order_number=int(row['Номер заказа']),
-                defaults={
-                    'order_date': order_date,
-                    'delivery_date': delivery_date,
-                    'pickup_point': pickup_point,
-                    'client': client_profile,
-                    'pickup_code': str(row['Код для получения']),
-                    'status': 'new' if row['Статус заказа'] == 'Новый' else 'completed',
-                }
-            )
-            for product, qty in items_list:
-                OrderItem.objects.get_or_create(order=order, product=product, defaults={'quantity': qty})
+                order_date = parse_date(row['Дата заказа'], datetime.now().date())
+                delivery_date = parse_date(row['Дата доставки'], order_date)
 
-        self.stdout.write(self.style.SUCCESS('Импорт завершён'))
\ No newline at end of file
+                order_number = int(row['Номер заказа'])
+                orders.setdefault(order_number, Order(
+                    order_number=order_number,
+                    order_date=order_date,
+                    delivery_date=delivery_date,
+                    pickup_point_id=pickup_point_id,
+                    client_id=client_id,
+                    pickup_code=str(row['Код для получения']),
+                    status='new' if row['Статус заказа'] == 'Новый' else 'completed',
+                ))
+                for product_id, qty in items_list:
+                    order_items.setdefault((order_number, product_id), qty)
+
+            existing = set(Order.objects.filter(order_number__in=list(orders))
+                           .values_list('order_number', flat=True))
+            Order.objects.bulk_create([order for number, order in orders.items()
+                                       if number not in existing],
+                                      batch_size=self.batch_size)
+            order_ids = dict(Order.objects.filter(order_number__in=list(orders))
+                             .values_list('order_number', 'id'))
+            existing_items = set(OrderItem.objects.filter(order_id__in=order_ids.values())
+                                 .values_list('order_id', 'product_id'))
+            OrderItem.objects.bulk_create(
+                [OrderItem(order_id=order_ids[number], product_id=product_id, quantity=qty)
+                 for (number, product_id), qty in order_items.items()
+                 if (order_ids[number], product_id) not in existing_items],
+                batch_size=self.batch_size,
+            )
@@ -0,0 +1,169 @@
+import gzip
+import time
+from collections import Counter, defaultdict
+
+from django.core import serializers
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.core.serializers.base import DeserializationError
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, IntegrityError, connections, transaction
+from django.db.models.constants import OnConflict
+
+from main.cache import bump_catalog_version, bump_profile_version
+from main.json_stream import iter_json_array
+from main.models import Profile
+from main.search import rebuild_index
+from main.stock import recalculate_reserved
+
+
+class Command(BaseCommand):
+    help = ('Быстрая загрузка JSON-дампа manage.py dumpdata: потоковый разбор, bulk-вставка '
+            'по моделям без сигналов и обработки фото, затем сброс последовательностей, '
+            'перестройка индекса поиска и резервов')
+
+    def add_arguments(self, parser):
+        parser.add_argument('fixture', help='Файл дампа (.json или .json.gz)')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Объектов одной модели в одной вставке (по умолчанию 1000)'
+        )
+        parser.add_argument(
+            '--exclude',
+            action='append',
+            default=[],
+            help='Пропустить приложение или модель (app_label или app_label.ModelName), можно несколько'
+        )
+        parser.add_argument(
+            '--ignorenonexistent',
+            action='store_true',
+            help='Пропускать поля и модели, которых нет в текущей схеме'
+        )
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help='База, в которую загружается дамп'
+        )
+
+    def handle(self, *args, **options):
+        self.using = options['database']
+        self.batch_size = options['batch_size']
+        self.pending = defaultdict(list)
+        self.m2m = defaultdict(list)
+        self.counts = Counter()
+        self.profile_users = set()
+        connection = connections[self.using]
+        excluded = {label.lower() for label in options['exclude']}
+        fixture = options['fixture']
+        opener = gzip.open if fixture.endswith('.gz') else open
+
+        started = time.perf_counter()
+        try:
+            with opener(fixture, 'rt', encoding='utf-8') as f, transaction.atomic(using=self.using):
+                # Как loaddata: ссылки проверяются один раз в конце, поэтому
+                # пачки можно вставлять по мере чтения, не дожидаясь зависимостей
+                with connection.constraint_checks_disabled():
+                    objects = serializers.deserialize(
+                        'python', self._filtered(iter_json_array(f), excluded),
+                        using=self.using, ignorenonexistent=options['ignorenonexistent'])
+                    for deserialized in objects:
+                        self._add(deserialized)
+                    # Остатки — в порядке зависимостей моделей
+                    for model in serializers.sort_dependencies([(None, list(self.pending))],
+                                                               allow_cycles=True):
+                        self._flush(model)
+                    for through in list(self.m2m):
+                        self._flush_m2m(through)
+                connection.check_constraints(
+                    table_names=[model._meta.db_table for model in self.counts])
+
+                sequence_sql = connection.ops.sequence_reset_sql(no_style(), list(self.counts))
+                if sequence_sql:
+                    with connection.cursor() as cursor:
+                        for sql in sequence_sql:
+                            cursor.execute(sql)
+
+                # Сигналы не вызывались: индекс поиска и резервы пересчитываем целиком
+                rebuild_index(using=self.using)
+                recalculate_reserved(using=self.using)
+        except FileNotFoundError:
+            raise CommandError(f'Файл {fixture} не найден')
+        except (DeserializationError, ValueError, IntegrityError, DatabaseError) as e:
+            raise CommandError(f'Ошибка загрузки {fixture}: {e}')
+
+        bump_catalog_version()
+        for user_id in self.profile_users:
+            bump_profile_version(user_id)
+
+        elapsed = time.perf_counter() - started
+        for model, count in sorted(self.counts.items(), key=lambda item: item[0]._meta.label):
+            self.stdout.write(f'  {model._meta.label}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено объектов: {sum(self.counts.values())} за {elapsed:.2f} с'))
+
+    def _filtered(self, items, excluded):
+        for item in items:
+            label = str(item.get('model', '')).lower()
+            if label in excluded or label.split('.')[0] in excluded:
+                continue
+            yield item
+
+    def _add(self, deserialized):
+        obj = deserialized.object
+        model = type(obj)
+        if isinstance(obj, Profile):
+            self.profile_users.add(obj.user_id)
+        if obj.pk is None or model._meta.parents:
+            # Без pk не связать m2m, наследование таблиц bulk-вставка не умеет:
+            # такие объекты сохраняются как в loaddata (raw, без Model.save())
+            deserialized.save(using=self.using)
+            self.counts[model] += 1
+            return
+
+        self.pending[model].append(obj)
+        for name, pks in (deserialized.m2m_data or {}).items():
+            field = model._meta.get_field(name)
+            through = field.remote_field.through
+            # Строки явной промежуточной модели приходят в дампе отдельными объектами
+            if not through._meta.auto_created:
+                continue
+            source = through._meta.get_field(field.m2m_field_name()).attname
+            target = through._meta.get_field(field.m2m_reverse_field_name()).attname
+            self.m2m[through].extend(through(**{source: obj.pk, target: pk}) for pk in pks)
+            if len(self.m2m[through]) >= self.batch_size:
+                self._flush_m2m(through)
+        if len(self.pending[model]) >= self.batch_size:
+            self._flush(model)
+
+    def _flush(self, model):
+        objs = self.pending.pop(model, [])
+        if not objs:
+            return
+        opts = model._meta
+        connection = connections[self.using]
+        fields = opts.concrete_fields
+        update_fields = [field for field in fields if not field.primary_key]
+        # Объект с существующим pk обновляется, как при loaddata
+        if update_fields and connection.features.supports_update_conflicts_with_target:
+            conflict = {'on_conflict': OnConflict.UPDATE, 'update_fields': update_fields,
+                        'unique_fields': [opts.pk]}
+        else:
+            conflict = {}
+        batch_size = max(min(self.batch_size, connection.ops.bulk_batch_size(fields, objs)), 1)
+        queryset = model._base_manager.using(self.using)
+        for start in range(0, len(objs), batch_size):
+            # raw=True, как у loaddata: значения пишутся как есть, без pre_save
+            # (bulk_create перезаписал бы поля auto_now текущим временем).
+            # QuerySet._insert — внутренний метод, на котором стоит bulk_create;
+            # сигнатура проверена для Django 4.2 (requirements.txt), при обновлении
+            # Django сверить её и прогнать LoadFixtureTests
+            queryset._insert(objs[start:start + batch_size], fields=fields, raw=True,
+                             using=self.using, **conflict)
+        self.counts[model] += len(objs)
+
+    def _flush_m2m(self, through):
+        rows = self.m2m.pop(through, [])
+        if rows:
+            through._base_manager.using(self.using).bulk_create(
+                rows, batch_size=self.batch_size, ignore_conflicts=True)
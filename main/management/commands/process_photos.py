@@ -0,0 +1,100 @@
+import os
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+from django.utils import timezone
+
+from main.models import PhotoTask
+from main.photos import process_photo
+
+
+class Command(BaseCommand):
+    help = 'Фоновый обработчик очереди фото товаров'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Обработать текущую очередь и завершиться'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=2.0,
+            help='Пауза между опросами пустой очереди, секунд (по умолчанию 2)'
+        )
+        parser.add_argument(
+            '--batch',
+            type=int,
+            default=20,
+            help='Сколько задач выбирать за один опрос (по умолчанию 20)'
+        )
+        parser.add_argument(
+            '--retry-delay',
+            type=int,
+            default=30,
+            help='Пауза перед повтором упавшей задачи, секунд (по умолчанию 30)'
+        )
+        parser.add_argument(
+            '--stale-minutes',
+            type=int,
+            default=10,
+            help='Через сколько минут зависшая задача снова считается свободной'
+        )
+
+    def handle(self, *args, **options):
+        self.stale_after = timedelta(minutes=options['stale_minutes'])
+        self.retry_delay = timedelta(seconds=options['retry_delay'])
+        self.stdout.write('Обработчик фото запущен')
+        while True:
+            ids = list(self._available().order_by('updated_at')
+                       .values_list('id', flat=True)[:options['batch']])
+            if not ids:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+            for task_id in ids:
+                if self._claim(task_id):
+                    self._process(PhotoTask.objects.select_related('product').get(id=task_id))
+
+    def _available(self):
+        now = timezone.now()
+        return PhotoTask.objects.filter(
+            Q(status='pending', attempts=0) |
+            Q(status='pending', updated_at__lt=now - self.retry_delay) |
+            Q(status='processing', updated_at__lt=now - self.stale_after)
+        )
+
+    def _claim(self, task_id):
+        # Условный UPDATE: задачу получит только один из параллельных обработчиков
+        return self._available().filter(id=task_id).update(
+            status='processing', attempts=F('attempts') + 1, updated_at=timezone.now()
+        ) == 1
+
+    def _process(self, task):
+        photo = task.product.photo
+        try:
+            if photo:
+                name = photo.name
+                filename = name[len('products/'):] if name.startswith('products/') else os.path.basename(name)
+                process_photo(photo.path, str(settings.MEDIA_ROOT), filename)
+        except Exception as e:
+            last_error = f'{type(e).__name__}: {e}'
+            status = 'failed' if task.attempts >= PhotoTask.MAX_ATTEMPTS else 'pending'
+            message = self.style.WARNING(f'Товар {task.product_id}: {last_error}')
+        else:
+            status, last_error = 'done', ''
+            message = f'Товар {task.product_id}: фото обработано'
+        # Условный UPDATE: если за время обработки товар сохранили с новым фото,
+        # PhotoTask.enqueue() уже вернул задачу в очередь (attempts=0), и этот
+        # результат относится к старому фото — его нельзя записывать поверх
+        finished = PhotoTask.objects.filter(
+            pk=task.pk, status='processing', attempts=task.attempts
+        ).update(status=status, last_error=last_error, updated_at=timezone.now())
+        if not finished:
+            message = f'Товар {task.product_id}: фото изменилось во время обработки, задача снова в очереди'
+        self.stdout.write(message)
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from main.photos import evict_thumbnails
+
+
+class Command(BaseCommand):
+    help = 'Удаляет давно не использовавшиеся миниатюры сверх лимита кэша'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-mb',
+            type=int,
+            default=None,
+            help='Лимит кэша миниатюр в МБ (по умолчанию THUMBNAIL_CACHE_MAX_BYTES)'
+        )
+
+    def handle(self, *args, **options):
+        max_bytes = settings.THUMBNAIL_CACHE_MAX_BYTES
+        if options['max_mb'] is not None:
+            max_bytes = options['max_mb'] * 1024 * 1024
+        removed = evict_thumbnails(settings.MEDIA_ROOT, max_bytes)
+        self.stdout.write(self.style.SUCCESS(f'Удалено миниатюр: {removed}'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from main.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс товаров'
+
+    def handle(self, *args, **options):
+        if rebuild_index():
+            self.stdout.write(self.style.SUCCESS('Индекс поиска перестроен'))
+        else:
+            self.stdout.write(self.style.WARNING(
+                'Таблица FTS5 недоступна, поиск работает через icontains'))
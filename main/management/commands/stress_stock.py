@@ -0,0 +1,169 @@
+import datetime
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+from django.db.models import Max
+
+from main.models import Category, Manufacturer, Order, OrderItem, PickupPoint, Product, Profile, Supplier
+from main.stock import (OutOfStock, apply_stock_changes, order_quantities, release_order,
+                        stock_changes)
+
+STRESS_ARTICLE = 'STRESS'
+RETRIES = 20
+
+
+def _retry(action):
+    """
+    Выполняет action, повторяя её при ошибках блокировки базы.
+
+    На SQLite транзакция, начавшаяся с чтения, при конфликте записи сразу
+    получает "database is locked" — повтор здесь штатное поведение.
+    Возвращает False, если все попытки не удались.
+    """
+    for attempt in range(RETRIES):
+        try:
+            action()
+            return True
+        except OperationalError:
+            time.sleep(0.01 * (attempt + 1))
+    return False
+
+
+def _place_orders(product_id, client_id, pickup_point_id, numbers, quantity):
+    """Создаёт заказы по одному в транзакции, как форма заказа."""
+    today = datetime.date.today()
+    placed, rejected, errors = [], 0, 0
+    for number in numbers:
+        def place(number=number):
+            with transaction.atomic():
+                apply_stock_changes(stock_changes(None, ('new', {product_id: quantity})))
+                order = Order.objects.create(
+                    order_number=number, order_date=today, delivery_date=today,
+                    pickup_point_id=pickup_point_id, client_id=client_id, pickup_code='0',
+                )
+                OrderItem.objects.create(order=order, product_id=product_id, quantity=quantity)
+            placed.append(order.pk)
+        try:
+            if not _retry(place):
+                errors += 1
+        except OutOfStock:
+            rejected += 1
+    connections.close_all()
+    return placed, rejected, errors
+
+
+def _finish_orders(order_ids, complete):
+    """Завершает (complete=True) или удаляет заказы."""
+    errors = 0
+    for pk in order_ids:
+        def finish(pk=pk):
+            with transaction.atomic():
+                order = Order.objects.select_for_update().get(pk=pk)
+                if complete:
+                    quantities = order_quantities(order)
+                    apply_stock_changes(stock_changes(('new', quantities), ('completed', quantities)))
+                    order.status = 'completed'
+                    order.save(update_fields=['status'])
+                else:
+                    release_order(order)
+                    order.delete()
+        if not _retry(finish):
+            errors += 1
+    connections.close_all()
+    return errors
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочная проверка резервирования: параллельные процессы создают, '
+            'завершают и удаляют заказы на один товар и проверяют, что остаток не ушёл в минус')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=8,
+            help='Число параллельных процессов'
+        )
+        parser.add_argument(
+            '--orders',
+            type=int,
+            default=400,
+            help='Сколько заказов попытаться создать'
+        )
+        parser.add_argument(
+            '--stock',
+            type=int,
+            default=100,
+            help='Остаток тестового товара'
+        )
+        parser.add_argument(
+            '--quantity',
+            type=int,
+            default=1,
+            help='Количество товара в каждом заказе'
+        )
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        quantity = options['quantity']
+        stock = options['stock']
+
+        client = Profile.objects.filter(role='client').first()
+        pickup_point = PickupPoint.objects.first()
+        if client is None or pickup_point is None:
+            raise CommandError('Нужны хотя бы один клиент и пункт выдачи (manage.py import_data)')
+
+        product = Product.objects.create(
+            article=STRESS_ARTICLE, name='Нагрузочный тест', unit='шт.', price=1,
+            category=Category.objects.get_or_create(name=STRESS_ARTICLE)[0],
+            supplier=Supplier.objects.get_or_create(name=STRESS_ARTICLE)[0],
+            manufacturer=Manufacturer.objects.get_or_create(name=STRESS_ARTICLE)[0],
+            quantity_in_stock=stock,
+        )
+        first_number = (Order.objects.aggregate(last=Max('order_number'))['last'] or 0) + 1
+        numbers = list(range(first_number, first_number + options['orders']))
+        try:
+            # Дочерние процессы должны открыть собственные соединения с базой
+            connections.close_all()
+            with ProcessPoolExecutor(workers) as executor:
+                results = list(executor.map(
+                    _place_orders,
+                    *zip(*[(product.pk, client.pk, pickup_point.pk, numbers[i::workers], quantity)
+                           for i in range(workers)])))
+                placed = [pk for ids, _, _ in results for pk in ids]
+                rejected = sum(r for _, r, _ in results)
+                errors = sum(e for _, _, e in results)
+                self.stdout.write(f'Создано заказов: {len(placed)}, отказано: {rejected}, '
+                                  f'ошибок базы: {errors}')
+                self._check(product, stock, reserved=len(placed) * quantity)
+
+                # Половину заказов завершаем, половину удаляем — одновременно
+                completed, deleted = placed[::2], placed[1::2]
+                jobs = ([(completed[i::workers], True) for i in range(workers)] +
+                        [(deleted[i::workers], False) for i in range(workers)])
+                errors = sum(executor.map(_finish_orders, *zip(*jobs)))
+            finished = Order.objects.filter(pk__in=completed, status='completed').count()
+            remaining = Order.objects.filter(pk__in=placed, status='new').count()
+            self.stdout.write(f'Завершено: {finished}, удалено: {len(placed) - finished - remaining}, '
+                              f'ошибок базы: {errors}')
+            self._check(product, stock - finished * quantity, reserved=remaining * quantity)
+        finally:
+            OrderItem.objects.filter(product=product).delete()
+            Order.objects.filter(order_number__in=numbers).delete()
+            product.delete()
+            for model in (Category, Supplier, Manufacturer):
+                model.objects.filter(name=STRESS_ARTICLE).exclude(
+                    pk__in=Product.objects.values(model._meta.model_name)).delete()
+
+        self.stdout.write(self.style.SUCCESS('Остатки и резервы согласованы'))
+
+    def _check(self, product, stock, reserved):
+        product.refresh_from_db()
+        self.stdout.write(f'  на складе: {product.quantity_in_stock}, '
+                          f'в резерве: {product.quantity_reserved}')
+        if (product.quantity_in_stock, product.quantity_reserved) != (stock, reserved):
+            raise CommandError(f'Ожидалось на складе {stock}, в резерве {reserved}')
+        if product.quantity_reserved > product.quantity_in_stock:
+            raise CommandError('Резерв превышает остаток')
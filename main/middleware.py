@@ -0,0 +1,30 @@
+from django.contrib import auth
+from django.utils.functional import SimpleLazyObject
+
+from .roles import ANONYMOUS, session_role
+
+
+class RoleMiddleware:
+    """
+    Подставляет request.user с уже известной ролью (user._role).
+
+    Пользователь и роль вычисляются лениво, при первом обращении, а роль
+    берётся из сессии — обычный запрос обходится без запроса к профилю.
+    Подключается сразу после AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.user = SimpleLazyObject(lambda: self._get_user(request))
+        return self.get_response(request)
+
+    @staticmethod
+    def _get_user(request):
+        user = auth.get_user(request)
+        if user.is_authenticated:
+            user._role = SimpleLazyObject(lambda: session_role(request, user))
+        else:
+            user._role = ANONYMOUS
+        return user
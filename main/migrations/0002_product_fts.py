@@ -0,0 +1,44 @@
+from django.db import migrations, OperationalError
+
+
+def create_fts_table(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                'CREATE VIRTUAL TABLE IF NOT EXISTS main_product_fts USING fts5('
+                'name, article, description, category, supplier, manufacturer, '
+                "tokenize = 'unicode61')"
+            )
+        except OperationalError:
+            # SQLite собран без FTS5 — поиск будет работать через icontains
+            return
+        cursor.execute(
+            'INSERT INTO main_product_fts '
+            '(rowid, name, article, description, category, supplier, manufacturer) '
+            'SELECT p.id, p.name, p.article, p.description, c.name, s.name, m.name '
+            'FROM main_product p '
+            'JOIN main_category c ON c.id = p.category_id '
+            'JOIN main_supplier s ON s.id = p.supplier_id '
+            'JOIN main_manufacturer m ON m.id = p.manufacturer_id'
+        )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('DROP TABLE IF EXISTS main_product_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.11 on 2026-10-18 10:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0002_product_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PhotoTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('processing', 'Обрабатывается'), ('done', 'Готово'), ('failed', 'Ошибка')], default='pending', max_length=20)),
+                ('attempts', models.IntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='photo_task', to='main.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'updated_at'], name='main_photot_status_770580_idx')],
+            },
+        ),
+    ]
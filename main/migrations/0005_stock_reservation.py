@@ -0,0 +1,30 @@
+# Generated by Django 4.2.11 on 2026-10-18 10:50
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def reserve_new_orders(apps, schema_editor):
+    # Уже существующие новые заказы резервируют товар так же, как созданные после миграции
+    Product = apps.get_model('main', 'Product')
+    OrderItem = apps.get_model('main', 'OrderItem')
+    reserved = (OrderItem.objects.filter(product=OuterRef('pk'), order__status='new')
+                .values('product').annotate(total=Sum('quantity')).values('total'))
+    Product.objects.update(quantity_reserved=Coalesce(Subquery(reserved), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0004_view_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='quantity_reserved',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(reserve_new_orders, migrations.RunPython.noop),
+    ]
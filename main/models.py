@@ -1,9 +1,12 @@
-from django.db import models
+from django.db import models, transaction
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
-from PIL import Image
-import os
+from django.db.models import (Count, DecimalField, ExpressionWrapper, F, OuterRef,
+                              Subquery, Sum)
+from django.db.models.functions import Round
+from .photos import remove_photo_files
 
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -14,6 +17,36 @@ class Manufacturer(models.Model):
 class Supplier(models.Model):
     name = models.CharField(max_length=100, unique=True)
 
+def effective_price(prefix=''):
+    """
+    Цена со скидкой как выражение SQL.
+
+    prefix — путь до товара от запрашиваемой модели, например 'product__'.
+    Делим на 100.0, чтобы SQLite не округлил результат целочисленным делением.
+    Округляем до копеек в самом запросе: по этому значению сортирует курсорная
+    пагинация, и ключ сортировки должен точно совпадать со значением в курсоре.
+    """
+    return Round(
+        F(f'{prefix}price') * (100 - F(f'{prefix}discount')) / 100.0,
+        2,
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+
+def line_total():
+    """Стоимость позиции заказа (количество x цена со скидкой) как выражение SQL."""
+    return ExpressionWrapper(
+        F('quantity') * effective_price('product__'),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+
+# Счётчики склада, которые ведёт main/stock.py
+STOCK_FIELDS = ('quantity_in_stock', 'quantity_reserved')
+
+class ProductQuerySet(models.QuerySet):
+    def with_effective_price(self):
+        """Добавляет поле effective_price — цену со скидкой, посчитанную базой."""
+        return self.annotate(effective_price=effective_price())
+
 class Product(models.Model):
     article = models.CharField(max_length=20, unique=True)
     name = models.CharField(max_length=200)
@@ -26,26 +59,66 @@ class Product(models.Model):
     discount = models.IntegerField(default=0)
     quantity_in_stock = models.IntegerField(default=0,
                                             validators=[MinValueValidator(0)])
+    # Зарезервировано под новые заказы, ведётся main/stock.py
+    quantity_reserved = models.IntegerField(default=0, editable=False)
     description = models.TextField(blank=True)
     photo = models.ImageField(upload_to='products/', blank=True, null=True)
 
+    objects = ProductQuerySet.as_manager()
+
+    class Meta:
+        # Сортировки каталога (см. main/pagination.py) идут с добором по id,
+        # поэтому индексы составные; по убыванию SQLite читает их с конца
+        indexes = [
+            models.Index(fields=['price', 'id']),
+            models.Index(fields=['name', 'id']),
+            models.Index(fields=['quantity_in_stock', 'id']),
+            models.Index(fields=['discount', 'id']),
+        ]
+
     def discounted_price(self):
         return self.price * (100 - self.discount) / 100
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем загруженное фото, чтобы save() не перечитывал товар из базы
+        if 'photo' in field_names:
+            instance._loaded_photo = values[field_names.index('photo')] or None
+        if 'quantity_in_stock' in field_names:
+            instance._loaded_stock = values[field_names.index('quantity_in_stock')]
+        return instance
+
     def save(self, *args, **kwargs):
-        try:
-            this = Product.objects.get(id=self.id)
-            if this.photo and this.photo != self.photo:
-                if os.path.isfile(this.photo.path):
-                    os.remove(this.photo.path)
-        except Product.DoesNotExist:
-            pass
-        super().save(*args, **kwargs)
-        if self.photo:
-            img = Image.open(self.photo.path)
-            if img.size != (300, 200):
-                img = img.resize((300, 200), Image.Resampling.LANCZOS)
-                img.save(self.photo.path)
+        if hasattr(self, '_loaded_photo'):
+            old_photo = self._loaded_photo
+        elif self.pk:
+            old_photo = Product.objects.filter(pk=self.pk).values_list('photo', flat=True).first()
+        else:
+            old_photo = None
+        stock_delta = None
+        if not self._state.adding and kwargs.get('update_fields') is None and hasattr(self, '_loaded_stock'):
+            # Остатки меняют и заказы (main/stock.py) условными UPDATE. Полная
+            # запись строки вернула бы загруженные значения поверх сделанных за
+            # это время резервов и списаний, поэтому резерв не пишется вовсе,
+            # а правка остатка применяется как разница к текущему значению
+            kwargs['update_fields'] = [field.name for field in self._meta.concrete_fields
+                                       if not field.primary_key and field.name not in STOCK_FIELDS]
+            stock_delta = self.quantity_in_stock - self._loaded_stock
+        with transaction.atomic():
+            if stock_delta:
+                Product.objects.filter(pk=self.pk).update(
+                    quantity_in_stock=F('quantity_in_stock') + stock_delta)
+            super().save(*args, **kwargs)
+        self._loaded_stock = self.quantity_in_stock
+        new_photo = self.photo.name if self.photo else None
+        if old_photo != new_photo:
+            if old_photo:
+                remove_photo_files(settings.MEDIA_ROOT, old_photo)
+            if new_photo:
+                # Масштабирование выполняет фоновый обработчик (manage.py process_photos)
+                PhotoTask.enqueue(self)
+        self._loaded_photo = new_photo
 
     def clean(self):
         if self.discount < 0 or self.discount > 100:
@@ -55,6 +128,32 @@ class Product(models.Model):
         if self.quantity_in_stock < 0:
             raise ValidationError('Количество не может быть отрицательным')
 
+class PhotoTask(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'В очереди'),
+        ('processing', 'Обрабатывается'),
+        ('done', 'Готово'),
+        ('failed', 'Ошибка'),
+    ]
+    MAX_ATTEMPTS = 3
+
+    product = models.OneToOneField(Product, on_delete=models.CASCADE,
+                                   related_name='photo_task')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'updated_at'])]
+
+    @classmethod
+    def enqueue(cls, product):
+        cls.objects.update_or_create(
+            product=product,
+            defaults={'status': 'pending', 'attempts': 0, 'last_error': ''},
+        )
+
 class Profile(models.Model):
     ROLE_CHOICES = [
         ('client', 'Авторизированный клиент'),
@@ -66,9 +165,33 @@ class Profile(models.Model):
     full_name = models.CharField(max_length=150)
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='client')
 
+    class Meta:
+        indexes = [models.Index(fields=['role', 'full_name'])]
+
 class PickupPoint(models.Model):
     address = models.CharField(max_length=300, unique=True)
 
+class OrderQuerySet(models.QuerySet):
+    def with_totals(self):
+        """
+        Добавляет поля items_count и total_amount.
+
+        Итоги считаются коррелированными подзапросами: база вычисляет их
+        только для выбранных строк, а count() по такому queryset их не трогает.
+        """
+        items = OrderItem.objects.filter(order=OuterRef('pk')).values('order')
+        return self.annotate(
+            items_count=Subquery(items.annotate(count=Count('id')).values('count')),
+            total_amount=Subquery(items.annotate(total=Sum(line_total())).values('total'),
+                                  output_field=DecimalField(max_digits=14, decimal_places=2)),
+        )
+
+    def revenue(self):
+        """Сумма всех заказов queryset одним агрегирующим запросом."""
+        total = OrderItem.objects.filter(order__in=self.values('pk')).aggregate(
+            total=Sum(line_total()))['total']
+        return total or 0
+
 class Order(models.Model):
     STATUS_CHOICES = [
         ('new', 'Новый'),
@@ -83,6 +206,11 @@ class Order(models.Model):
     pickup_code = models.CharField(max_length=20)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='new')
 
+    objects = OrderQuerySet.as_manager()
+
+    class Meta:
+        indexes = [models.Index(fields=['order_date', 'id'])]
+
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
     product = models.ForeignKey(Product, on_delete=models.PROTECT)
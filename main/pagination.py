@@ -0,0 +1,94 @@
+"""
+Курсорная (keyset) пагинация для каталога.
+
+Вместо OFFSET страница определяется значением поля сортировки и id
+последней показанной строки, поэтому время выборки не зависит от номера
+страницы: база просто продолжает проход по индексу с нужного места.
+"""
+import base64
+import binascii
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+
+PAGE_SIZE = 50
+
+# Режим сортировки -> (поле, по убыванию)
+SORT_FIELDS = {
+    '': ('id', False),
+    'price_asc': ('price', False),
+    'price_desc': ('price', True),
+    'name_asc': ('name', False),
+    'name_desc': ('name', True),
+    'quantity_asc': ('quantity_in_stock', False),
+    'quantity_desc': ('quantity_in_stock', True),
+    # Цена со скидкой считается в запросе (Product.objects.with_effective_price())
+    'effective_price_asc': ('effective_price', False),
+    'effective_price_desc': ('effective_price', True),
+    # Только для результатов полнотекстового поиска (см. main/search.py)
+    'relevance': ('search_rank', False),
+}
+
+# Преобразование значения из курсора обратно к типу поля
+_FIELD_TYPES = {
+    'id': int,
+    'price': Decimal,
+    'name': str,
+    'quantity_in_stock': int,
+    'effective_price': Decimal,
+    'search_rank': float,
+}
+
+
+def encode_cursor(value, pk):
+    raw = json.dumps([str(value), pk]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor, field):
+    """Возвращает (значение, id) или None, если курсор повреждён."""
+    try:
+        value, pk = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return _FIELD_TYPES[field](value), int(pk)
+    except (ValueError, TypeError, KeyError, InvalidOperation, binascii.Error):
+        return None
+
+
+def order_for_sort(queryset, sort):
+    """Сортирует queryset по режиму sort с устойчивым добором по id."""
+    field, desc = SORT_FIELDS.get(sort, SORT_FIELDS[''])
+    prefix = '-' if desc else ''
+    if field == 'id':
+        return queryset.order_by(f'{prefix}id')
+    return queryset.order_by(f'{prefix}{field}', f'{prefix}id')
+
+
+def keyset_page(queryset, sort, cursor=None, page_size=PAGE_SIZE):
+    """
+    Возвращает (строки страницы, курсор следующей страницы или None).
+
+    queryset не должен быть заранее отсортирован — сортировка задаётся здесь.
+    """
+    field, desc = SORT_FIELDS.get(sort, SORT_FIELDS[''])
+    queryset = order_for_sort(queryset, sort)
+
+    position = decode_cursor(cursor, field) if cursor else None
+    if position is not None:
+        value, pk = position
+        op = 'lt' if desc else 'gt'
+        if field == 'id':
+            queryset = queryset.filter(**{f'id__{op}': pk})
+        else:
+            queryset = queryset.filter(
+                Q(**{f'{field}__{op}': value}) |
+                Q(**{field: value, f'id__{op}': pk})
+            )
+
+    rows = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, field), last.pk)
+    return rows, next_cursor
@@ -0,0 +1,242 @@
+"""
+Конвейер обработки фотографий товаров при импорте.
+
+Каждое фото копируется без изменений в media/products/<имя> и за один
+проход декодируется и сохраняется во всех нужных размерах: для карточки
+300x200 и миниатюра для таблицы каталога. Уменьшенные копии лежат рядом с
+миниатюрами, которые создаются по запросу (thumbs/<ширина>x<высота>/...),
+оригинал ими не перезаписывается. Обработка идёт в пуле процессов; фото, содержимое которого не
+изменилось с прошлого импорта (по sha1 в манифесте), повторно не
+обрабатывается.
+
+Модуль намеренно не импортирует модели Django: функция process_photo
+выполняется в дочерних процессах, а также в фоновом обработчике очереди
+(manage.py process_photos), куда фото попадают из Product.save().
+"""
+import functools
+import glob
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+# Имя размера -> (ширина, высота)
+PHOTO_SIZES = {
+    'detail': (300, 200),
+    'table': (50, 33),
+}
+
+MANIFEST_NAME = '.photo_manifest.json'
+
+# Размеры миниатюр, которые разрешено запрашивать по URL: таблица 1x/2x и карточка
+THUMBNAIL_SIZES = {(50, 33), (100, 66), (300, 200)}
+
+# Формат -> (расширение файла, имя формата для Pillow)
+THUMBNAIL_FORMATS = {
+    'jpeg': ('jpg', 'JPEG'),
+    'webp': ('webp', 'WEBP'),
+    'avif': ('avif', 'AVIF'),
+}
+_EXTENSION_FORMATS = {ext: fmt for fmt, (ext, _) in THUMBNAIL_FORMATS.items()}
+
+
+@functools.lru_cache(maxsize=None)
+def available_formats():
+    """Форматы, которые умеет кодировать установленный Pillow (AVIF — через плагин)."""
+    extensions = Image.registered_extensions()
+    return [fmt for fmt, (ext, pil_format) in THUMBNAIL_FORMATS.items()
+            if extensions.get(f'.{ext}') == pil_format]
+
+
+def thumbnail_name(name, size, fmt='jpeg'):
+    """
+    Детерминированный путь миниатюры относительно MEDIA_ROOT.
+
+    Например, thumbs/50x33/products/1.jpg.webp. Тот же путь служит и URL
+    (MEDIA_URL + имя), поэтому уже созданные миниатюры может отдавать
+    веб-сервер, а Django генерирует только отсутствующие.
+    """
+    width, height = size
+    return f'thumbs/{width}x{height}/{name}.{THUMBNAIL_FORMATS[fmt][0]}'
+
+
+def parse_thumbnail_name(rest):
+    """Разбирает "<имя исходника>.<расширение>" в (имя, формат) или None."""
+    name, _, ext = rest.rpartition('.')
+    fmt = _EXTENSION_FORMATS.get(ext)
+    if not name or fmt is None:
+        return None
+    return name, fmt
+
+
+def render_thumbnail(img, size, fmt, path):
+    """Сохраняет уменьшенную копию открытого изображения в заданном формате."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    thumb = img.resize(size, Image.Resampling.LANCZOS)
+    if fmt == 'jpeg' and thumb.mode not in ('RGB', 'L'):
+        thumb = thumb.convert('RGB')
+    # Пишем во временный файл, чтобы параллельный запрос не увидел половину картинки.
+    # Имя уникально и для потоков одного процесса, которые делают ту же миниатюру
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix='.tmp', delete=False) as tmp:
+        try:
+            thumb.save(tmp, THUMBNAIL_FORMATS[fmt][1], quality=80)
+        except BaseException:
+            tmp.close()
+            os.remove(tmp.name)
+            raise
+    os.replace(tmp.name, path)
+
+
+def ensure_thumbnail(media_root, name, size, fmt):
+    """
+    Возвращает (путь, создана ли сейчас), генерируя миниатюру при первом обращении.
+
+    Путь равен None, если исходного файла нет или это не изображение.
+    """
+    path = os.path.join(media_root, thumbnail_name(name, size, fmt))
+    if os.path.exists(path):
+        return path, False
+    src = os.path.join(media_root, name)
+    if not os.path.isfile(src):
+        return None, False
+    try:
+        with Image.open(src) as img:
+            img.load()
+    except OSError:
+        # UnidentifiedImageError (не картинка) или повреждённый файл
+        return None, False
+    render_thumbnail(img, size, fmt, path)
+    return path, True
+
+
+def evict_thumbnails(media_root, max_bytes):
+    """
+    Удаляет давно не использовавшиеся миниатюры, пока кэш не уложится в max_bytes.
+
+    Возвращает число удалённых файлов.
+    """
+    entries = []
+    total = 0
+    for root, dirs, files in os.walk(os.path.join(media_root, 'thumbs')):
+        for file in files:
+            path = os.path.join(root, file)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((max(stat.st_atime, stat.st_mtime), stat.st_size, path))
+            total += stat.st_size
+    removed = 0
+    for used_at, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    return removed
+
+
+def variant_name(filename, size):
+    """Путь уменьшенной копии относительно MEDIA_ROOT."""
+    return thumbnail_name(f'products/{filename}', PHOTO_SIZES[size])
+
+
+def file_hash(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def process_photo(src, media_root, filename, known_hash=None):
+    """
+    Копирует и масштабирует одно фото. Возвращает (filename, hash, обработано ли).
+
+    src может уже лежать в products/<filename> (фото, загруженное через
+    форму) — тогда оригинал остаётся как есть, пишутся только копии.
+    """
+    digest = file_hash(src)
+    original = os.path.join(media_root, 'products', filename)
+    targets = [os.path.join(media_root, variant_name(filename, size)) for size in PHOTO_SIZES]
+    if digest == known_hash and all(os.path.exists(path) for path in [original, *targets]):
+        return filename, digest, False
+
+    if os.path.abspath(src) != os.path.abspath(original):
+        os.makedirs(os.path.dirname(original), exist_ok=True)
+        shutil.copyfile(src, original)
+    with Image.open(src) as img:
+        img.load()
+        for size, path in zip(PHOTO_SIZES, targets):
+            render_thumbnail(img, PHOTO_SIZES[size], 'jpeg', path)
+    return filename, digest, True
+
+
+def remove_photo_files(media_root, name):
+    """Удаляет фото (имя относительно MEDIA_ROOT) вместе со всеми его миниатюрами."""
+    paths = {os.path.join(media_root, name)}
+    paths.update(glob.glob(os.path.join(glob.escape(os.path.join(str(media_root), 'thumbs')),
+                                        '*', glob.escape(name) + '.*')))
+    for path in paths:
+        if os.path.isfile(path):
+            os.remove(path)
+
+
+class PhotoPipeline:
+    """
+    Пул процессов и манифест хешей на время одного импорта.
+
+    workers <= 1 — обработка в текущем процессе.
+    """
+
+    def __init__(self, src_dir, media_root, workers=None):
+        self.src_dir = src_dir
+        self.media_root = str(media_root)
+        self.manifest_path = os.path.join(self.media_root, 'products', MANIFEST_NAME)
+        self.manifest = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        workers = os.cpu_count() if workers is None else workers
+        self.executor = ProcessPoolExecutor(workers) if workers > 1 else None
+        self.processed = 0
+        self.skipped = 0
+
+    def process(self, filenames):
+        """Обрабатывает пачку фото; возвращает множество реально найденных файлов."""
+        jobs = [(os.path.join(self.src_dir, name), self.media_root, name, self.manifest.get(name))
+                for name in dict.fromkeys(filenames)
+                if os.path.exists(os.path.join(self.src_dir, name))]
+        if self.executor is not None:
+            results = self.executor.map(process_photo, *zip(*jobs)) if jobs else []
+        else:
+            results = (process_photo(*job) for job in jobs)
+
+        found = set()
+        for filename, digest, changed in results:
+            found.add(filename)
+            self.manifest[filename] = digest
+            if changed:
+                self.processed += 1
+            else:
+                self.skipped += 1
+        self._save_manifest()
+        return found
+
+    def _save_manifest(self):
+        os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
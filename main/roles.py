@@ -0,0 +1,76 @@
+"""
+Роль текущего пользователя без запроса к профилю на каждый запрос.
+
+Роль и ФИО кэшируются в сессии вместе с версией профиля (main/cache.py).
+Сохранение или удаление Profile увеличивает версию (main/signals.py) в общем
+для всех процессов кэше, и при следующем запросе пользователя роль
+перечитывается из базы, какой бы процесс его ни обслуживал. Кроме того,
+запись в сессии живёт не дольше SESSION_TTL — на случай, если кэш версий
+очистили.
+"""
+import time
+
+from .cache import profile_version
+from .models import Profile
+
+SESSION_KEY = '_profile_role'
+SESSION_TTL = 15 * 60
+
+ROLE_NAMES = dict(Profile.ROLE_CHOICES)
+
+
+class Role:
+    """Роль пользователя с заранее вычисленными флагами для шаблонов и проверок."""
+
+    def __init__(self, name=None, full_name=''):
+        self.name = name
+        self.full_name = full_name
+        self.display = ROLE_NAMES.get(name, '')
+        self.is_client = name == 'client'
+        self.is_manager = name == 'manager'
+        self.is_admin = name == 'admin'
+        self.is_manager_or_admin = name in ('manager', 'admin')
+
+    def __bool__(self):
+        return self.name is not None
+
+
+ANONYMOUS = Role()
+
+
+def _load_role(user):
+    profile = Profile.objects.filter(user_id=user.pk).values('role', 'full_name').first()
+    return Role(profile['role'], profile['full_name']) if profile else ANONYMOUS
+
+
+def session_role(request, user):
+    """Роль из сессии, если запись ещё действительна, иначе — из базы с записью в сессию."""
+    version = profile_version(user.pk)
+    cached = request.session.get(SESSION_KEY)
+    if (cached and cached['user_id'] == user.pk and cached['version'] == version
+            and cached['loaded_at'] > time.time() - SESSION_TTL):
+        return Role(cached['role'], cached['full_name'])
+    role = _load_role(user)
+    request.session[SESSION_KEY] = {
+        'user_id': user.pk,
+        'version': version,
+        'loaded_at': time.time(),
+        'role': role.name,
+        'full_name': role.full_name,
+    }
+    return role
+
+
+def user_role(user):
+    """
+    Роль пользователя.
+
+    Для request.user её заранее ставит RoleMiddleware; для прочих объектов
+    User роль читается из базы один раз и запоминается на объекте.
+    """
+    if not user.is_authenticated:
+        return ANONYMOUS
+    role = getattr(user, '_role', None)
+    if role is None:
+        role = user._role = _load_role(user)
+    return role
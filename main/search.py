@@ -0,0 +1,131 @@
+"""
+Полнотекстовый поиск по каталогу.
+
+На SQLite используется виртуальная таблица FTS5 (rowid = id товара), в
+которой хранятся название, артикул, описание и названия категории,
+поставщика и производителя. Таблица поддерживается в актуальном состоянии
+сигналами (main/signals.py). На остальных СУБД, а также если SQLite собран
+без FTS5, поиск откатывается к прежнему фильтру по icontains.
+"""
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Category, Manufacturer, Product, Supplier
+
+SEARCH_TABLE = 'main_product_fts'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+_fts_ready = set()
+
+
+def fts_available(using=DEFAULT_DB_ALIAS):
+    """Есть ли в базе using таблица FTS5 для поиска."""
+    conn = connections[using]
+    if conn.vendor != 'sqlite':
+        return False
+    if using not in _fts_ready and SEARCH_TABLE in conn.introspection.table_names():
+        _fts_ready.add(using)
+    return using in _fts_ready
+
+
+# Колонка индекса -> поле модели для запасного поиска по icontains
+SEARCH_COLUMNS = {
+    'name': 'name',
+    'article': 'article',
+    'description': 'description',
+    'category': 'category__name',
+    'supplier': 'supplier__name',
+    'manufacturer': 'manufacturer__name',
+}
+
+
+def build_match_query(search, columns=None):
+    """
+    Превращает строку из поля поиска в выражение MATCH.
+
+    Каждое слово ищется по префиксу ("вело" найдёт "велосипед"), все слова
+    должны встретиться в товаре. Спецсимволы FTS5 в запрос не попадают.
+    columns ограничивает поиск перечисленными колонками индекса.
+    """
+    tokens = _TOKEN_RE.findall(search.lower())
+    query = ' '.join(f'"{token}"*' for token in tokens)
+    if query and columns:
+        query = '{%s} : (%s)' % (' '.join(columns), query)
+    return query
+
+
+def search_products(queryset, search, columns=None):
+    """
+    Фильтрует queryset по строке поиска.
+
+    При наличии FTS5 товары дополнительно аннотируются полем search_rank
+    (bm25, меньше — релевантнее). columns — колонки из SEARCH_COLUMNS,
+    по которым искать (по умолчанию все).
+    """
+    match = build_match_query(search, columns) if fts_available() else ''
+    if not match:
+        condition = Q()
+        for column in columns or SEARCH_COLUMNS:
+            condition |= Q(**{f'{SEARCH_COLUMNS[column]}__icontains': search})
+        return queryset.filter(condition)
+    product_table = Product._meta.db_table
+    # Таблица индекса присоединяется один раз: MATCH выполняется один раз на
+    # запрос, а bm25() берётся из той же строки соединения, без подзапроса
+    return queryset.extra(
+        tables=[SEARCH_TABLE],
+        where=[f'{SEARCH_TABLE}.rowid = {product_table}.id', f'{SEARCH_TABLE} MATCH %s'],
+        params=[match],
+    ).annotate(search_rank=RawSQL(f'bm25({SEARCH_TABLE})', []))
+
+
+def index_products(field=None, value=None, using=DEFAULT_DB_ALIAS):
+    """
+    Переиндексирует товары одним INSERT ... SELECT.
+
+    field/value ограничивают набор товаров (например, category_id=5 после
+    переименования категории); без них перестраивается весь индекс.
+    """
+    if not fts_available(using):
+        return
+    product_table = Product._meta.db_table
+    where, params = '', []
+    if field is not None:
+        assert field in ('id', 'category_id', 'supplier_id', 'manufacturer_id')
+        where, params = f'WHERE p.{field} = %s', [value]
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid IN '
+            f'(SELECT p.id FROM {product_table} p {where})',
+            params,
+        )
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE} '
+            '(rowid, name, article, description, category, supplier, manufacturer) '
+            'SELECT p.id, p.name, p.article, p.description, c.name, s.name, m.name '
+            f'FROM {product_table} p '
+            f'JOIN {Category._meta.db_table} c ON c.id = p.category_id '
+            f'JOIN {Supplier._meta.db_table} s ON s.id = p.supplier_id '
+            f'JOIN {Manufacturer._meta.db_table} m ON m.id = p.manufacturer_id '
+            f'{where}',
+            params,
+        )
+
+
+def unindex_product(product_id, using=DEFAULT_DB_ALIAS):
+    if not fts_available(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [product_id])
+
+
+def rebuild_index(using=DEFAULT_DB_ALIAS):
+    """Полностью перестраивает индекс (после bulk-операций без сигналов)."""
+    if not fts_available(using):
+        return False
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+    index_products(using=using)
+    return True
@@ -0,0 +1,48 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Category, Manufacturer, Product, Profile, Supplier
+from . import search
+from .cache import bump_catalog_version, bump_profile_version
+
+
+# ---- Поисковый индекс ----
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, raw=False, using=None, **kwargs):
+    if not raw:
+        search.index_products('id', instance.pk, using=using)
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, using=None, **kwargs):
+    search.unindex_product(instance.pk, using=using)
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Supplier)
+@receiver(post_save, sender=Manufacturer)
+def reindex_related_products(sender, instance, created, raw=False, using=None, **kwargs):
+    # У только что созданного справочника ещё нет товаров
+    if created or raw:
+        return
+    field = {Category: 'category_id', Supplier: 'supplier_id',
+             Manufacturer: 'manufacturer_id'}[sender]
+    search.index_products(field, instance.pk, using=using)
+
+
+# ---- Кэш фрагментов каталога ----
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Supplier)
+@receiver(post_delete, sender=Supplier)
+@receiver(post_save, sender=Manufacturer)
+@receiver(post_delete, sender=Manufacturer)
+def invalidate_catalog_cache(sender, **kwargs):
+    bump_catalog_version()
+
+
+# ---- Роль в сессии ----
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_session_role(sender, instance, **kwargs):
+    bump_profile_version(instance.user_id)
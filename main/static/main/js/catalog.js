@@ -0,0 +1,165 @@
+// Живой поиск и бесконечная прокрутка каталога товаров.
+// Фильтры запрашивают JSON (product_table_json) с дебаунсом, незавершённый
+// запрос отменяется, а строки таблицы обновляются точечно, без замены всей
+// таблицы. Следующие страницы подгружаются готовым HTML (product_rows_partial).
+(function () {
+    var $container = $('#product-table-container');
+    var jsonUrl = $container.data('json-url');
+    var rowsUrl = $container.data('rows-url');
+    var PLACEHOLDER = 'products/picture.png';
+    var DEBOUNCE_MS = 250;
+
+    var request = null;
+    var debounceTimer = null;
+    var loadingMore = false;
+    var responses = {};  // URL запроса -> {etag, data} для ответов 304
+
+    function filterParams() {
+        return {
+            'search': $('#search').val() || '',
+            'discount_range': $('#discount_range').val() || '',
+            'sort': $('#sort').val() || ''
+        };
+    }
+
+    function thumbnail(photo, thumbs) {
+        var name = photo || PLACEHOLDER;
+        function url(scale, ext) {
+            return thumbs.media_url + 'thumbs/' + (50 * scale) + 'x' + (33 * scale) + '/' + name + '.' + ext;
+        }
+        function srcset(ext) {
+            return url(1, ext) + ' 1x, ' + url(2, ext) + ' 2x';
+        }
+        var $picture = $('<picture>');
+        thumbs.formats.forEach(function (ext) {
+            $('<source>').attr({type: 'image/' + ext, srcset: srcset(ext)}).appendTo($picture);
+        });
+        $('<img>').attr({
+            src: url(1, 'jpg'), srcset: srcset('jpg'),
+            width: 50, height: 33, alt: '', loading: 'lazy'
+        }).appendTo($picture);
+        return $picture;
+    }
+
+    function buildRow(row, data) {
+        var $tr = $('<tr>').attr({'data-id': row.id, 'data-sig': JSON.stringify(row)})
+            .toggleClass('discount-high', row.discount > 15)
+            .toggleClass('out-of-stock', row.quantity === 0);
+        $('<td>').append(thumbnail(row.photo, data.thumbs)).appendTo($tr);
+        $('<td>').text(row.article).appendTo($tr);
+        $('<td>').text(row.name).appendTo($tr);
+        $('<td>').text(row.category).appendTo($tr);
+        var $price = $('<td>').appendTo($tr);
+        if (row.new_price !== null) {
+            $('<span class="old-price">').text(row.price).appendTo($price);
+            $price.append(' ');
+            $('<span class="new-price">').text(row.new_price).appendTo($price);
+        } else {
+            $price.text(row.price);
+        }
+        $('<td>').text(row.discount + '%').appendTo($tr);
+        $('<td>').text(row.quantity).appendTo($tr);
+        if (data.urls) {
+            var $actions = $('<td>').appendTo($tr);
+            $('<a class="btn">').text('Редактировать')
+                .attr('href', data.urls.edit.replace('/0/', '/' + row.id + '/'))
+                .appendTo($actions);
+            $actions.append(' ');
+            $('<button type="submit" class="btn" form="product-delete-form">').text('✖')
+                .attr('formaction', data.urls.delete.replace('/0/', '/' + row.id + '/'))
+                .on('click', function () { return confirm('Удалить товар?'); })
+                .appendTo($actions);
+        }
+        return $tr[0];
+    }
+
+    // Приводит tbody к списку data.rows: неизменённые строки остаются на месте
+    // (переставляются при необходимости), изменённые и новые строятся заново.
+    function patchRows(data) {
+        var tbody = $container.find('tbody')[0];
+        var existing = {};
+        $(tbody).children('tr[data-id]').each(function () {
+            existing[this.getAttribute('data-id')] = this;
+        });
+        $(tbody).children('tr.load-more').remove();
+
+        var previous = null;
+        data.rows.forEach(function (row) {
+            var node = existing[row.id];
+            delete existing[row.id];
+            if (!node || node.getAttribute('data-sig') !== JSON.stringify(row)) {
+                $(node).remove();
+                node = buildRow(row, data);
+            }
+            var reference = previous ? previous.nextSibling : tbody.firstChild;
+            if (reference !== node) {
+                tbody.insertBefore(node, reference);
+            }
+            previous = node;
+        });
+        $.each(existing, function (id, node) { $(node).remove(); });
+
+        if (data.next_cursor) {
+            $('<tr class="load-more">').attr('data-cursor', data.next_cursor)
+                .append($('<td colspan="8">').text('Загрузка...'))
+                .appendTo(tbody);
+        }
+        loadMore();
+    }
+
+    function updateTable() {
+        clearTimeout(debounceTimer);
+        if (request) {
+            request.abort();
+        }
+        var params = filterParams();
+        var key = jsonUrl + '?' + $.param(params);
+        var cached = responses[key];
+        var current = request = $.ajax({
+            url: jsonUrl,
+            data: params,
+            dataType: 'json',
+            headers: cached ? {'If-None-Match': cached.etag} : {}
+        });
+        current.done(function (data, status, xhr) {
+            if (current !== request) {
+                return;  // ответ на устаревший запрос
+            }
+            if (xhr.status === 304) {
+                data = cached.data;
+            } else if (xhr.getResponseHeader('ETag')) {
+                responses[key] = {etag: xhr.getResponseHeader('ETag'), data: data};
+            }
+            patchRows(data);
+        }).always(function () {
+            if (current === request) {
+                request = null;
+            }
+        });
+    }
+
+    function scheduleUpdate() {
+        clearTimeout(debounceTimer);
+        debounceTimer = setTimeout(updateTable, DEBOUNCE_MS);
+    }
+
+    function loadMore() {
+        var $more = $container.find('tr.load-more');
+        if (loadingMore || !$more.length) return;
+        if ($more.offset().top > $(window).scrollTop() + $(window).height() + 200) return;
+        loadingMore = true;
+        var params = filterParams();
+        params['cursor'] = $more.data('cursor');
+        $.get(rowsUrl, params, function (data) {
+            $more.replaceWith(data);
+        }).always(function () {
+            loadingMore = false;
+            loadMore();
+        });
+    }
+
+    $('#search').on('input', scheduleUpdate);
+    $('#discount_range, #sort').on('change', updateTable);
+    $(window).on('scroll resize', loadMore);
+    $(loadMore);
+})();
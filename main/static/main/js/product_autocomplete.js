@@ -0,0 +1,72 @@
+// Подбор товара в строках заказа (виджет ProductAutocomplete).
+// Видимое поле отправляет запрос в product_lookup с дебаунсом, выбранный
+// товар записывается в скрытое поле формы. Следующая страница подсказок
+// подгружается при прокрутке списка до конца.
+(function () {
+    var DEBOUNCE_MS = 250;
+
+    function init($widget) {
+        var $hidden = $widget.find('input[type=hidden]');
+        var $search = $widget.find('.product-search');
+        var $list = $widget.find('.product-suggestions');
+        var url = $widget.data('lookup-url');
+        var request = null;
+        var timer = null;
+        var nextCursor = null;
+
+        function load(cursor) {
+            if (request) {
+                request.abort();
+            }
+            var params = {'q': $search.val()};
+            if (cursor) {
+                params.cursor = cursor;
+            }
+            request = $.getJSON(url, params, function (data) {
+                if (!cursor) {
+                    $list.empty();
+                }
+                $.each(data.results, function (i, item) {
+                    $('<li>').text(item.text).attr('data-id', item.id).appendTo($list);
+                });
+                nextCursor = data.next_cursor;
+                $list.toggle($list.children().length > 0);
+            }).always(function () {
+                request = null;
+            });
+        }
+
+        $search.on('input', function () {
+            // Текст изменён — прежний выбор больше не действует
+            $hidden.val('');
+            clearTimeout(timer);
+            timer = setTimeout(function () { load(null); }, DEBOUNCE_MS);
+        });
+        $search.on('focus', function () {
+            if (!$list.children().length) {
+                load(null);
+            } else {
+                $list.show();
+            }
+        });
+        $search.on('blur', function () {
+            // Даём сработать клику по подсказке
+            setTimeout(function () { $list.hide(); }, 200);
+        });
+        $list.on('mousedown', 'li', function () {
+            $hidden.val($(this).data('id'));
+            $search.val($(this).text());
+            $list.hide();
+        });
+        $list.on('scroll', function () {
+            if (nextCursor && !request &&
+                    this.scrollTop + this.clientHeight >= this.scrollHeight - 10) {
+                load(nextCursor);
+            }
+        });
+    }
+
+    $('.product-autocomplete').each(function () {
+        init($(this));
+    });
+})();
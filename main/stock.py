@@ -0,0 +1,104 @@
+"""
+Резервирование товара на складе под заказы.
+
+Пока заказ новый, его позиции зарезервированы (Product.quantity_reserved).
+Когда заказ переходит в статус «Завершен», товар списывается со склада
+(quantity_in_stock), а резерв снимается. Свободный остаток — разница
+quantity_in_stock - quantity_reserved.
+
+Каждое изменение по товару — один условный UPDATE: проверку остатка и
+само изменение база выполняет атомарно, поэтому параллельные заказы не
+продадут больше, чем есть, и блокировать таблицу не нужно. Функции
+вызываются внутри transaction.atomic() вместе с сохранением заказа: если
+какого-то товара не хватило, откатываются и уже сделанные резервы.
+"""
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .cache import bump_catalog_version
+from .models import OrderItem, Product
+
+
+class OutOfStock(Exception):
+    def __init__(self, product_id, requested, article=None):
+        self.product_id = product_id
+        self.requested = requested
+        self.article = article
+        super().__init__(f'Недостаточно товара {article or product_id} на складе '
+                         f'(запрошено {requested})')
+
+
+def _effect(status, quantities):
+    """Вклад заказа в (резерв, остаток) по каждому товару."""
+    if status == 'new':
+        return {product_id: (quantity, 0) for product_id, quantity in quantities.items()}
+    if status == 'completed':
+        return {product_id: (0, -quantity) for product_id, quantity in quantities.items()}
+    return {}
+
+
+def stock_changes(before, after):
+    """
+    Изменения (резерв, остаток) по товарам при переходе заказа из before в after.
+
+    Состояние заказа — пара (статус, {id товара: количество}) или None,
+    если заказа нет (ещё не создан или удалён).
+    """
+    changes = {}
+    for sign, state in ((-1, before), (1, after)):
+        if state is None:
+            continue
+        for product_id, (reserved, stock) in _effect(*state).items():
+            old_reserved, old_stock = changes.get(product_id, (0, 0))
+            changes[product_id] = (old_reserved + sign * reserved, old_stock + sign * stock)
+    return {product_id: change for product_id, change in changes.items() if change != (0, 0)}
+
+
+def apply_stock_changes(changes, articles=None):
+    """
+    Применяет изменения из stock_changes условными UPDATE.
+
+    Бросает OutOfStock, если свободного остатка или товара на складе не
+    хватает. Товары обновляются в порядке id, чтобы параллельные
+    транзакции не ждали друг друга по кругу. articles — {id товара: артикул}
+    для текста ошибки (у формы заказа товары уже загружены).
+    """
+    for product_id in sorted(changes):
+        reserved, stock = changes[product_id]
+        products = Product.objects.filter(pk=product_id)
+        # На сколько уменьшается свободный остаток
+        shortage = reserved - stock
+        if shortage > 0:
+            products = products.filter(quantity_in_stock__gte=F('quantity_reserved') + shortage)
+        if stock < 0:
+            products = products.filter(quantity_in_stock__gte=-stock)
+        updated = products.update(quantity_reserved=F('quantity_reserved') + reserved,
+                                  quantity_in_stock=F('quantity_in_stock') + stock)
+        if not updated:
+            raise OutOfStock(product_id, max(shortage, -stock), (articles or {}).get(product_id))
+    # update() не вызывает сигналы, а остатки видны в каталоге
+    if any(stock for reserved, stock in changes.values()):
+        bump_catalog_version()
+
+
+def order_quantities(order):
+    """Количество по товарам в сохранённом заказе: {id товара: количество}."""
+    return dict(order.items.values_list('product').annotate(total=Sum('quantity')))
+
+
+def release_order(order):
+    """
+    Снимает резерв удаляемого заказа.
+
+    Завершённый заказ уже списан со склада, его удаление остатки не меняет.
+    """
+    if order.status == 'new':
+        apply_stock_changes(stock_changes(('new', order_quantities(order)), None))
+
+
+def recalculate_reserved(using=DEFAULT_DB_ALIAS):
+    """Пересчитывает резервы по всем новым заказам (после импорта без сигналов)."""
+    reserved = (OrderItem.objects.using(using).filter(product=OuterRef('pk'), order__status='new')
+                .values('product').annotate(total=Sum('quantity')).values('total'))
+    Product.objects.using(using).update(quantity_reserved=Coalesce(Subquery(reserved), 0))
@@ -0,0 +1,53 @@
+"""
+Потоковая отдача больших таблиц без пагинации.
+
+Шаблон страницы рендерится один раз с меткой на месте строк и разрезается
+по ней: начало сразу уходит клиенту, затем строки рендерятся пачками по мере
+чтения queryset.iterator(chunk_size), в конце — остаток страницы. Время до
+первого байта и занимаемая память не зависят от числа строк.
+"""
+import itertools
+
+from django.http import StreamingHttpResponse
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+CHUNK_SIZE = 500
+
+# Подставляется в шаблон как stream_rows; HTML-комментарий не экранируется
+ROWS_MARKER = mark_safe('<!-- stream-rows -->')
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def stream_table(request, template_name, rows_template_name, rows_name, queryset,
+                 context=None, chunk_size=CHUNK_SIZE):
+    """
+    StreamingHttpResponse со страницей template_name и строками из queryset.
+
+    template_name выводит {{ stream_rows }} на месте строк, rows_template_name
+    рендерит одну пачку строк из переменной rows_name.
+    """
+    context = context or {}
+    page = get_template(template_name).render(dict(context, stream_rows=ROWS_MARKER), request)
+    head, tail = page.split(ROWS_MARKER, 1)
+    rows_template = get_template(rows_template_name)
+
+    def content():
+        yield head
+        empty = True
+        for chunk in _chunks(queryset.iterator(chunk_size=chunk_size), chunk_size):
+            empty = False
+            yield rows_template.render(dict(context, **{rows_name: chunk}), request)
+        if empty:
+            yield rows_template.render(dict(context, **{rows_name: []}), request)
+        yield tail
+
+    response = StreamingHttpResponse(content(), content_type='text/html; charset=utf-8')
+    # Иначе nginx накопит ответ целиком перед отправкой
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,39 @@
+"""
+Прогрев кэша шаблонов.
+
+В рабочем режиме (DEBUG=False) шаблоны загружаются через
+django.template.loaders.cached.Loader: каждый шаблон разбирается один раз
+на процесс. warm_templates() разбирает все шаблоны заранее, при запуске
+процесса веб-сервера (shoe_store/wsgi.py, asgi.py), чтобы первые запросы не
+платили за компиляцию, а синтаксические ошибки в шаблонах обнаруживались
+сразу.
+"""
+import os
+
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+
+
+def template_names(engine):
+    """Имена всех .html-шаблонов, которые видят загрузчики движка."""
+    names = set()
+    for loader in engine.engine.template_loaders:
+        for directory in loader.get_dirs():
+            for root, dirs, files in os.walk(directory):
+                for file in files:
+                    if file.endswith('.html'):
+                        path = os.path.join(root, file)
+                        names.add(os.path.relpath(path, directory).replace(os.sep, '/'))
+    return sorted(names)
+
+
+def warm_templates():
+    """Загружает все шаблоны во все движки DjangoTemplates; возвращает их число."""
+    count = 0
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        for name in template_names(engine):
+            engine.get_template(name)
+            count += 1
+    return count
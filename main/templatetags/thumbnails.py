@@ -0,0 +1,40 @@
+from django import template
+from django.conf import settings
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from main.photos import available_formats, thumbnail_name
+
+register = template.Library()
+
+# Фото-заглушка для товаров без фото (относительно MEDIA_ROOT)
+PLACEHOLDER_PHOTO = 'products/picture.png'
+
+
+def _srcset(name, width, height, fmt):
+    return ', '.join(
+        f'{settings.MEDIA_URL}{thumbnail_name(name, (width * scale, height * scale), fmt)} {scale}x'
+        for scale in (1, 2)
+    )
+
+
+@register.simple_tag
+def product_thumbnail(photo, width=50, height=33):
+    """
+    <picture> с миниатюрами фото товара: AVIF/WebP, если доступны, и JPEG.
+
+    Размеры width x height и вдвое большие должны входить в photos.THUMBNAIL_SIZES.
+    """
+    # Тег выводится в каждой строке таблицы, поэтому разметка собирается
+    # f-строками с однократным экранированием имени, без format_html
+    name = escape(photo.name if photo else PLACEHOLDER_PHOTO)
+    width, height = int(width), int(height)
+    sources = ''.join(
+        f'<source type="image/{fmt}" srcset="{_srcset(name, width, height, fmt)}">'
+        for fmt in available_formats() if fmt != 'jpeg'
+    )
+    return mark_safe(
+        f'<picture>{sources}<img src="{settings.MEDIA_URL}{thumbnail_name(name, (width, height))}" '
+        f'srcset="{_srcset(name, width, height, "jpeg")}" width="{width}" height="{height}" '
+        f'alt="" loading="lazy"></picture>'
+    )
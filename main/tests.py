@@ -1,3 +1,785 @@
-from django.test import TestCase
+import csv
+import gzip
+import json
+import os
+import random
+import re
+import tempfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
\ No newline at end of file
+import openpyxl
+import pandas as pd
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.http import QueryDict
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.html import escape
+from PIL import Image
+
+from .cache import bump_catalog_version, fragment_key, profile_version
+from .excel_stream import iter_row_chunks
+from .management.commands.import_data import Command as ImportDataCommand
+from .management.commands.process_photos import Command as ProcessPhotosCommand
+from .management.commands.stress_stock import _place_orders
+from .forms import OrderItemFormSet, ProductForm, product_label
+from .models import (Category, Manufacturer, Order, OrderItem, PhotoTask, PickupPoint, Product,
+                     Profile, Supplier)
+from .pagination import keyset_page
+from .photos import PHOTO_SIZES, PhotoPipeline, process_photo, variant_name
+from .search import fts_available, rebuild_index, search_products
+from .stock import OutOfStock, apply_stock_changes, recalculate_reserved, stock_changes
+
+
+def create_products(count, seed=0):
+    """Каталог из count товаров со случайными ценами и скидками (bulk, без сигналов)."""
+    rng = random.Random(seed)
+    category = Category.objects.create(name='Ботинки')
+    manufacturer = Manufacturer.objects.create(name='Kari')
+    supplier = Supplier.objects.create(name='Обувь для вас')
+    Product.objects.bulk_create(
+        Product(
+            article=f'A{number:05d}',
+            name=f'Товар {number}',
+            unit='шт.',
+            price=Decimal(rng.randint(100, 2000000)) / 100,
+            discount=rng.choice((0, 3, 5, 7, 12, 15, 19, 30, 33)),
+            quantity_in_stock=rng.randint(0, 50),
+            supplier=supplier,
+            manufacturer=manufacturer,
+            category=category,
+        )
+        for number in range(count)
+    )
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_products(3010)
+
+    def scroll(self, sort, page_size=50):
+        queryset = Product.objects.with_effective_price()
+        rows, cursor = keyset_page(queryset, sort, page_size=page_size)
+        result = list(rows)
+        while cursor:
+            rows, cursor = keyset_page(queryset, sort, cursor, page_size=page_size)
+            result.extend(rows)
+        return result
+
+    def test_every_sort_visits_each_product_once(self):
+        total = Product.objects.count()
+        for sort in ('', 'price_asc', 'price_desc', 'name_asc', 'quantity_desc',
+                     'effective_price_asc', 'effective_price_desc'):
+            with self.subTest(sort=sort):
+                ids = [p.pk for p in self.scroll(sort)]
+                self.assertEqual(len(ids), total)
+                self.assertEqual(len(set(ids)), total)
+
+    def test_effective_price_order_matches_cursor_value(self):
+        rows = self.scroll('effective_price_desc')
+        keys = [(p.effective_price, p.pk) for p in rows]
+        self.assertEqual(keys, sorted(keys, reverse=True))
+        # Ключ сортировки — ровно то значение, которое попадает в курсор
+        self.assertTrue(all(p.effective_price == p.effective_price.quantize(Decimal('0.01'))
+                            for p in rows))
+
+
+class SearchPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_products(600)
+        # Артикулы на 0, 3, 6, 9 — кожаные, слово встречается в описании разное число раз
+        leather = Product.objects.filter(article__regex=r'[0369]$')
+        for product in leather:
+            product.description = 'кожаные ' * (product.pk % 4 + 1)
+        Product.objects.bulk_update(leather, ['description'])
+        cls.expected = {product.pk for product in leather}
+        rebuild_index()
+
+    def scroll(self, sort, page_size=25):
+        queryset = search_products(Product.objects.with_effective_price(), 'кожан')
+        rows, cursor = keyset_page(queryset, sort, page_size=page_size)
+        result = list(rows)
+        while cursor:
+            rows, cursor = keyset_page(queryset, sort, cursor, page_size=page_size)
+            result.extend(rows)
+        return result
+
+    def test_search_results_are_paginated_without_gaps(self):
+        # Без FTS5 (PostgreSQL, SQLite без расширения) сортировки по релевантности нет
+        sorts = ('effective_price_asc', 'name_desc') + (('relevance',) if fts_available() else ())
+        for sort in sorts:
+            with self.subTest(sort=sort):
+                ids = [p.pk for p in self.scroll(sort)]
+                self.assertEqual(len(ids), len(self.expected))
+                self.assertEqual(set(ids), self.expected)
+
+    def test_relevance_order(self):
+        if not fts_available():
+            self.skipTest('Нет индекса FTS5: поиск работает через icontains, без релевантности')
+        ranks = [(p.search_rank, p.pk) for p in self.scroll('relevance')]
+        self.assertEqual(ranks, sorted(ranks))
+
+
+class ThumbnailViewTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.media_root = tmp.name
+        for folder in ('products', 'import'):
+            os.makedirs(os.path.join(self.media_root, folder))
+            Image.new('RGB', (300, 200), 'red').save(os.path.join(self.media_root, folder, 'shoe.jpg'))
+        with open(os.path.join(self.media_root, 'products', '.photo_manifest.json'), 'w') as f:
+            f.write('{}')
+
+    def get(self, rest):
+        url = reverse('product_thumbnail', kwargs={'width': 50, 'height': 33, 'rest': rest})
+        with override_settings(MEDIA_ROOT=self.media_root):
+            return self.client.get(url)
+
+    def test_thumbnail_is_created(self):
+        response = self.get('products/shoe.jpg.jpg')
+        self.assertEqual(response.status_code, 200)
+        response.close()
+        self.assertTrue(os.path.exists(
+            os.path.join(self.media_root, 'thumbs', '50x33', 'products', 'shoe.jpg.jpg')))
+
+    def test_not_an_image(self):
+        self.assertEqual(self.get('products/.photo_manifest.json.jpg').status_code, 404)
+
+    def test_only_product_photos(self):
+        self.assertEqual(self.get('import/shoe.jpg.jpg').status_code, 404)
+
+
+class PhotoQueueTests(TestCase):
+    def setUp(self):
+        # Product.save() удаляет файлы прежнего фото — только во временном MEDIA_ROOT
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.media_root = tmp.name
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        create_products(1)
+        self.product = Product.objects.get()
+        self.product.photo = 'products/old.jpg'
+        self.product.save()
+        self.command = ProcessPhotosCommand(stdout=StringIO())
+
+    def run_queue(self, side_effect=None):
+        with mock.patch('main.management.commands.process_photos.process_photo',
+                        side_effect=side_effect):
+            self.command.handle(once=True, batch=20, sleep=0, retry_delay=30, stale_minutes=10)
+        return PhotoTask.objects.get(product=self.product)
+
+    def test_task_done(self):
+        self.assertEqual(self.run_queue().status, 'done')
+
+    def test_original_is_kept(self):
+        os.makedirs(os.path.join(self.media_root, 'products'))
+        original = os.path.join(self.media_root, 'products', 'old.jpg')
+        Image.new('RGB', (640, 480), 'red').save(original)
+        with open(original, 'rb') as f:
+            content = f.read()
+        self.assertEqual(self.run_queue(side_effect=process_photo).status, 'done')
+        with open(original, 'rb') as f:
+            self.assertEqual(f.read(), content)
+        for size in PHOTO_SIZES:
+            with Image.open(os.path.join(self.media_root, variant_name('old.jpg', size))) as img:
+                self.assertEqual(img.size, PHOTO_SIZES[size])
+
+    def test_photo_replaced_during_processing(self):
+        processed = []
+
+        def process(src, media_root, filename):
+            processed.append(filename)
+            product = Product.objects.get(pk=self.product.pk)
+            if product.photo != 'products/new.jpg':
+                product.photo = 'products/new.jpg'
+                product.save()
+
+        task = self.run_queue(side_effect=process)
+        # Результат по старому фото не затёр возврат задачи в очередь: новое тоже обработано
+        self.assertEqual(processed, ['old.jpg', 'new.jpg'])
+        self.assertEqual(task.status, 'done')
+
+
+class StockReservationTests(TransactionTestCase):
+    def setUp(self):
+        create_products(1)
+        self.product = Product.objects.get()
+        self.product.quantity_in_stock = 10
+        self.product.save()
+        user = User.objects.create_user('client', password='client')
+        self.client_profile = Profile.objects.create(user=user, full_name='Клиент', role='client')
+        self.pickup_point = PickupPoint.objects.create(address='Пункт выдачи')
+
+    def test_out_of_stock(self):
+        with self.assertRaisesMessage(OutOfStock, 'Недостаточно товара A00000'):
+            apply_stock_changes(stock_changes(None, ('new', {self.product.pk: 11})),
+                                {self.product.pk: self.product.article})
+
+    def test_concurrent_orders_do_not_oversell(self):
+        workers, per_worker = 8, 5
+        with ThreadPoolExecutor(workers) as executor:
+            results = list(executor.map(
+                _place_orders,
+                *zip(*[(self.product.pk, self.client_profile.pk, self.pickup_point.pk,
+                        range(1000 + i * per_worker, 1000 + (i + 1) * per_worker), 1)
+                       for i in range(workers)])))
+        placed = sum(len(ids) for ids, _, _ in results)
+        rejected = sum(r for _, r, _ in results)
+        errors = sum(e for _, _, e in results)
+        self.product.refresh_from_db()
+        self.assertEqual(errors, 0)
+        self.assertEqual((placed, rejected), (10, workers * per_worker - 10))
+        self.assertEqual(Order.objects.count(), 10)
+        self.assertEqual((self.product.quantity_in_stock, self.product.quantity_reserved), (10, 10))
+
+
+class FragmentKeyTests(SimpleTestCase):
+    def key(self, query):
+        with mock.patch('main.cache.catalog_version', return_value=1):
+            return fragment_key('table', QueryDict(query), 'admin')
+
+    def test_parameter_order_does_not_matter(self):
+        self.assertEqual(self.key('search=a&sort=price_asc'), self.key('sort=price_asc&search=a'))
+
+    def test_special_characters_do_not_collide(self):
+        self.assertNotEqual(self.key('search=a%26sort%3Dprice_asc'), self.key('search=a&sort=price_asc'))
+        self.assertNotEqual(self.key('search=a&search=b'), self.key('search=a%26search%3Db'))
+
+
+class ProductStockSaveTests(TestCase):
+    def setUp(self):
+        create_products(1)
+        Product.objects.update(quantity_in_stock=10)
+        self.product = Product.objects.get()
+
+    def test_edit_keeps_concurrent_reservations(self):
+        # Резерв и списание сделаны, пока товар был открыт на редактирование
+        apply_stock_changes({self.product.pk: (3, -2)})
+        self.product.name = 'Новое название'
+        self.product.quantity_in_stock = 15
+        self.product.save()
+        product = Product.objects.get()
+        self.assertEqual(product.name, 'Новое название')
+        self.assertEqual((product.quantity_in_stock, product.quantity_reserved), (13, 3))
+
+    def test_form_rejects_stock_below_reserved(self):
+        apply_stock_changes({self.product.pk: (4, 0)})
+        data = {field: value for field, value in ProductForm(instance=self.product).initial.items()
+                if value is not None}
+        data['quantity_in_stock'] = 3
+        form = ProductForm(data, instance=self.product)
+        self.assertFalse(form.is_valid())
+        self.assertIn('quantity_in_stock', form.errors)
+        data['quantity_in_stock'] = 4
+        self.assertTrue(ProductForm(data, instance=self.product).is_valid())
+
+
+class ImportUsersTests(TestCase):
+    def test_role_change_bumps_profile_version(self):
+        user = User.objects.create_user('manager@example.com', password='x')
+        Profile.objects.create(user=user, full_name='Менеджер', role='client')
+        version = profile_version(user.pk)
+        command = ImportDataCommand(stdout=StringIO())
+        command.batch_size = 100
+        with self.captureOnCommitCallbacks(execute=True):
+            command._import_users([{'Логин': 'manager@example.com', 'Пароль': 'x',
+                                    'ФИО': 'Менеджер', 'Роль сотрудника': 'Менеджер'}])
+        self.assertEqual(Profile.objects.get(user=user).role, 'manager')
+        self.assertNotEqual(profile_version(user.pk), version)
+
+
+class OrderViewStockTests(TestCase):
+    def setUp(self):
+        create_products(2)
+        Product.objects.update(quantity_in_stock=10)
+        self.product, self.other = Product.objects.order_by('pk')
+        admin = User.objects.create_user('admin', password='admin')
+        Profile.objects.create(user=admin, full_name='Администратор', role='admin')
+        self.client.force_login(admin)
+        user = User.objects.create_user('client', password='client')
+        self.client_profile = Profile.objects.create(user=user, full_name='Клиент', role='client')
+        self.pickup_point = PickupPoint.objects.create(address='Пункт выдачи')
+
+    def post(self, url, status, lines, items=(), delete=()):
+        """
+        lines — [(товар, количество)]; items — существующие позиции в том же
+        порядке; delete — номера строк, отмеченных на удаление.
+        """
+        data = {
+            'order_number': 1, 'order_date': '2026-01-10', 'delivery_date': '2026-01-15',
+            'pickup_point': self.pickup_point.pk, 'client': self.client_profile.pk,
+            'pickup_code': '123', 'status': status,
+            'items-TOTAL_FORMS': len(lines), 'items-INITIAL_FORMS': len(items),
+            'items-MIN_NUM_FORMS': 0, 'items-MAX_NUM_FORMS': 1000,
+        }
+        for i, (product, quantity) in enumerate(lines):
+            data[f'items-{i}-product'] = product.pk
+            data[f'items-{i}-quantity'] = quantity
+            if i < len(items):
+                data[f'items-{i}-id'] = items[i].pk
+            if i in delete:
+                data[f'items-{i}-DELETE'] = 'on'
+        return self.client.post(url, data)
+
+    def stock(self, product):
+        product.refresh_from_db()
+        return product.quantity_in_stock, product.quantity_reserved
+
+    def test_create_complete_and_reopen(self):
+        response = self.post(reverse('order_add'), 'new', [(self.product, 4)])
+        self.assertRedirects(response, reverse('order_list'), fetch_redirect_response=False)
+        order = Order.objects.get()
+        self.assertEqual(self.stock(self.product), (10, 4))
+
+        edit_url = reverse('order_edit', kwargs={'pk': order.pk})
+        items = list(order.items.all())
+        self.post(edit_url, 'completed', [(self.product, 4)], items)
+        self.assertEqual(self.stock(self.product), (6, 0))
+
+        self.post(edit_url, 'new', [(self.product, 4)], items)
+        self.assertEqual(self.stock(self.product), (10, 4))
+
+    def test_deleted_line_releases_reserve(self):
+        self.post(reverse('order_add'), 'new', [(self.product, 4), (self.other, 2)])
+        order = Order.objects.get()
+        items = list(order.items.order_by('product_id'))
+        response = self.post(reverse('order_edit', kwargs={'pk': order.pk}), 'new',
+                             [(self.product, 4), (self.other, 2), (self.other, 1)], items, delete={1, 2})
+        self.assertRedirects(response, reverse('order_list'), fetch_redirect_response=False)
+        self.assertEqual(list(order.items.values_list('product_id', 'quantity')), [(self.product.pk, 4)])
+        self.assertEqual(self.stock(self.other), (10, 0))
+        self.assertEqual(self.stock(self.product), (10, 4))
+
+    def test_out_of_stock_is_form_error_without_partial_writes(self):
+        response = self.post(reverse('order_add'), 'new', [(self.product, 3), (self.other, 11)])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(f'Недостаточно товара {self.other.article}',
+                      ' '.join(response.context['form'].non_field_errors()))
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(self.stock(self.product), (10, 0))
+        self.assertEqual(self.stock(self.other), (10, 0))
+
+
+class StreamTableTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_products(130)
+        cls.admin = User.objects.create_user('admin', password='admin')
+        Profile.objects.create(user=cls.admin, full_name='Администратор', role='admin')
+
+    def row_ids(self, response):
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        return [int(pk) for pk in re.findall(r'<tr data-id="(\d+)"', content.decode())]
+
+    def test_admin_gets_every_row_in_sort_order(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('product_table_partial'), {'stream': '1', 'sort': 'price_asc'})
+        self.assertTrue(response.streaming)
+        expected = list(Product.objects.order_by('price', 'pk').values_list('pk', flat=True))
+        self.assertEqual(self.row_ids(response), expected)
+
+    def test_stream_is_admin_only(self):
+        response = self.client.get(reverse('product_table_partial'), {'stream': '1'})
+        self.assertFalse(response.streaming)
+        self.assertLess(len(self.row_ids(response)), Product.objects.count())
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_products(25)
+        cls.admin = User.objects.create_user('admin', password='admin')
+        Profile.objects.create(user=cls.admin, full_name='Администратор', role='admin')
+
+    def export(self, name, **params):
+        response = self.client.get(reverse('export_data', kwargs={'name': name}), params)
+        if response.streaming:
+            return response, b''.join(response.streaming_content)
+        return response, response.content
+
+    def test_requires_admin(self):
+        response, _ = self.export('products')
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response['Location'].startswith(reverse('login')))
+        user = User.objects.create_user('client', password='client')
+        Profile.objects.create(user=user, full_name='Клиент', role='client')
+        self.client.force_login(user)
+        self.assertEqual(self.export('products')[0].status_code, 302)
+
+    def test_csv_jsonl_and_gzip_contents(self):
+        self.client.force_login(self.admin)
+        expected = list(Product.objects.order_by('pk').values_list('article', 'quantity_in_stock'))
+
+        response, content = self.export('products', format='csv')
+        self.assertIn('attachment; filename="products.csv"', response['Content-Disposition'])
+        rows = list(csv.reader(content.decode('utf-8-sig').splitlines()))
+        self.assertEqual(rows[0][:2], ['ID', 'Артикул'])
+        self.assertEqual([(row[1], int(row[7])) for row in rows[1:]], expected)
+
+        _, content = self.export('products', format='jsonl')
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual([(row['article'], row['quantity_in_stock']) for row in rows], expected)
+
+        _, compressed = self.export('products', format='jsonl', compress='gzip')
+        self.assertEqual(gzip.decompress(compressed), content)
+
+    def test_xlsx(self):
+        self.client.force_login(self.admin)
+        _, content = self.export('products', format='xlsx')
+        sheet = openpyxl.load_workbook(BytesIO(content), read_only=True).active
+        rows = list(sheet.iter_rows(values_only=True))
+        self.assertEqual(rows[0][1], 'Артикул')
+        self.assertEqual([row[1] for row in rows[1:]],
+                         list(Product.objects.order_by('pk').values_list('article', flat=True)))
+
+    def test_bad_request(self):
+        self.client.force_login(self.admin)
+        self.assertEqual(self.export('products', format='pdf')[0].status_code, 400)
+        self.assertEqual(self.export('products', format='xlsx', compress='gzip')[0].status_code, 400)
+        self.assertEqual(self.export('users')[0].status_code, 404)
+
+
+class LoadFixtureTests(TestCase):
+    def setUp(self):
+        create_products(30)
+        user = User.objects.create_user('client', password='client')
+        client_profile = Profile.objects.create(user=user, full_name='Клиент', role='client')
+        pickup_point = PickupPoint.objects.create(address='Пункт выдачи')
+        products = list(Product.objects.order_by('pk')[:3])
+        for number, status in ((1, 'new'), (2, 'completed')):
+            order = Order.objects.create(order_number=number, order_date='2026-01-10',
+                                         delivery_date='2026-01-15', pickup_point=pickup_point,
+                                         client=client_profile, pickup_code='123', status=status)
+            for quantity, product in enumerate(products, start=1):
+                order.items.create(product=product, quantity=quantity)
+        recalculate_reserved()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.fixture = os.path.join(tmp.name, 'dump.json.gz')
+
+    def snapshot(self):
+        return {
+            model: list(model.objects.order_by('pk').values())
+            for model in (Category, Manufacturer, Supplier, Product, Profile, PickupPoint, Order,
+                          OrderItem)
+        }
+
+    def test_round_trip(self):
+        expected = self.snapshot()
+        self.assertTrue(any(p['quantity_reserved'] for p in expected[Product]))
+        call_command('dumpdata', 'main', output=self.fixture, verbosity=0)
+        for model in (OrderItem, Order, Product, Category, Manufacturer, Supplier, PickupPoint,
+                      Profile):
+            model.objects.all().delete()
+
+        call_command('load_fixture', self.fixture, batch_size=7, stdout=StringIO())
+        self.assertEqual(self.snapshot(), expected)
+        # Поиск по загруженным товарам работает: индекс перестроен
+        self.assertEqual(search_products(Product.objects.all(), 'Товар 17').count(), 1)
+
+
+# Пароли пользователей хешируются при каждом импорте: PBKDF2 занял бы почти всё время теста
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ImportDataTests(TestCase):
+    """Импорт файлов из import/ (учебные данные проекта)."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+        media = override_settings(MEDIA_ROOT=os.path.join(self.tmp, 'media'))
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def run_import(self, **options):
+        """Результат импорта; сам импорт откатывается, следующий начнётся с той же базы."""
+        with transaction.atomic():
+            call_command('import_data', photo_workers=1, stdout=StringIO(), **options)
+            result = self.snapshot()
+            transaction.set_rollback(True)
+        return result
+
+    def snapshot(self):
+        return {
+            'products': list(Product.objects.order_by('article').values_list(
+                'article', 'name', 'price', 'discount', 'quantity_in_stock', 'quantity_reserved',
+                'category__name', 'manufacturer__name', 'supplier__name', 'photo')),
+            'profiles': list(Profile.objects.order_by('user__username').values_list(
+                'user__username', 'full_name', 'role')),
+            'orders': list(Order.objects.order_by('order_number').values_list(
+                'order_number', 'order_date', 'delivery_date', 'pickup_point__address',
+                'client__full_name', 'pickup_code', 'status')),
+            'items': list(OrderItem.objects.order_by('order__order_number', 'product__article')
+                          .values_list('order__order_number', 'product__article', 'quantity')),
+        }
+
+    def test_batch_size_does_not_change_result(self):
+        result = self.run_import()
+        articles = set(pd.read_excel('import/Tovar.xlsx')['Артикул'])
+        self.assertEqual({row[0] for row in result['products']}, articles)
+        self.assertTrue(result['orders'] and result['items'])
+        # Резерв — сумма позиций новых заказов
+        reserved = Counter()
+        statuses = {number: status for number, *_, status in result['orders']}
+        for number, article, quantity in result['items']:
+            if statuses[number] == 'new':
+                reserved[article] += quantity
+        self.assertEqual({row[0]: row[5] for row in result['products'] if row[5]}, dict(reserved))
+        self.assertEqual(self.run_import(batch_size=3), result)
+
+    def test_reimport_replaces_catalog(self):
+        call_command('import_data', photo_workers=1, stdout=StringIO())
+        call_command('import_data', photo_workers=1, stdout=StringIO())
+        products = self.snapshot()['products']
+        self.assertEqual(len(products), len(set(pd.read_excel('import/Tovar.xlsx')['Артикул'])))
+        self.assertEqual(Product.objects.count(), len(products))
+
+    def test_stream_matches_batch_import(self):
+        checkpoint = os.path.join(self.tmp, 'checkpoint.json')
+        self.assertEqual(self.run_import(stream=True, chunk_size=3, checkpoint=checkpoint),
+                         self.run_import())
+        self.assertFalse(os.path.exists(checkpoint))
+
+    def test_stream_resumes_after_failure(self):
+        expected = self.run_import()
+        checkpoint = os.path.join(self.tmp, 'checkpoint.json')
+        options = {'stream': True, 'chunk_size': 2, 'checkpoint': checkpoint,
+                   'photo_workers': 1, 'stdout': StringIO()}
+        import_orders = ImportDataCommand._import_orders
+        calls = []
+
+        def fail_second_chunk(command, rows):
+            calls.append(len(rows))
+            if len(calls) == 2:
+                raise RuntimeError('Сбой на второй пачке')
+            import_orders(command, rows)
+
+        with transaction.atomic():
+            with mock.patch.object(ImportDataCommand, '_import_orders', fail_second_chunk):
+                with self.assertRaisesMessage(RuntimeError, 'Сбой на второй пачке'):
+                    call_command('import_data', **options)
+            with open(checkpoint, encoding='utf-8') as f:
+                self.assertEqual(json.load(f)['orders'], 2)
+            self.assertEqual(Order.objects.count(), 2)
+
+            call_command('import_data', resume=True, **options)
+            self.assertEqual(self.snapshot(), expected)
+            self.assertFalse(os.path.exists(checkpoint))
+            transaction.set_rollback(True)
+
+
+class ExcelStreamTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'rows.xlsx')
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(['Артикул', 'Количество'])
+        for row in (['A1', 1], ['A2', 2], [None, None], ['A4', 4], ['A5', 5]):
+            sheet.append(row)
+        workbook.save(self.path)
+
+    def test_chunks_and_positions(self):
+        chunks = list(iter_row_chunks(self.path, 2))
+        self.assertEqual([position for position, _ in chunks], [2, 5])
+        self.assertEqual([row['Артикул'] for _, rows in chunks for row in rows], ['A1', 'A2', 'A4', 'A5'])
+
+    def test_skip_and_names(self):
+        chunks = list(iter_row_chunks(self.path, 10, names=['article', 'qty'], skip=3))
+        # Без заголовка первая строка листа — тоже данные
+        self.assertEqual(chunks, [(6, [{'article': 'A4', 'qty': 4}, {'article': 'A5', 'qty': 5}])])
+
+
+class PhotoPipelineTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.src_dir = os.path.join(tmp.name, 'import')
+        self.media_root = os.path.join(tmp.name, 'media')
+        os.makedirs(self.src_dir)
+        for name, color in (('1.jpg', 'red'), ('2.jpg', 'blue')):
+            Image.new('RGB', (640, 480), color).save(os.path.join(self.src_dir, name))
+
+    def run_pipeline(self, filenames, workers=1):
+        pipeline = PhotoPipeline(self.src_dir, self.media_root, workers)
+        try:
+            found = pipeline.process(filenames)
+        finally:
+            pipeline.close()
+        return found, pipeline.processed, pipeline.skipped
+
+    def test_processes_each_photo_once(self):
+        # Пул процессов; дубликат имени и отсутствующий файл отбрасываются
+        self.assertEqual(self.run_pipeline(['1.jpg', '2.jpg', '1.jpg', 'missing.jpg'], workers=2),
+                         ({'1.jpg', '2.jpg'}, 2, 0))
+        for name in ('1.jpg', '2.jpg'):
+            self.assertTrue(os.path.exists(os.path.join(self.media_root, 'products', name)))
+            for size in PHOTO_SIZES:
+                with Image.open(os.path.join(self.media_root, variant_name(name, size))) as img:
+                    self.assertEqual(img.size, PHOTO_SIZES[size])
+
+    def test_unchanged_photos_are_skipped(self):
+        self.run_pipeline(['1.jpg', '2.jpg'])
+        self.assertEqual(self.run_pipeline(['1.jpg', '2.jpg']), ({'1.jpg', '2.jpg'}, 0, 2))
+        Image.new('RGB', (640, 480), 'green').save(os.path.join(self.src_dir, '2.jpg'))
+        os.remove(os.path.join(self.media_root, variant_name('1.jpg', 'table')))
+        self.assertEqual(self.run_pipeline(['1.jpg', '2.jpg']), ({'1.jpg', '2.jpg'}, 2, 0))
+
+
+class ProductJsonTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Скидка от 19% — у трети товаров: больше одной страницы
+        create_products(200)
+
+    def setUp(self):
+        # Ответы кэшируются по версии каталога, а bulk_create её не меняет
+        bump_catalog_version()
+
+    def get(self, **params):
+        return self.client.get(reverse('product_table_json'), params)
+
+    def test_filtered_pages(self):
+        params = {'discount_range': '19+', 'sort': 'price_asc'}
+        expected = list(Product.objects.filter(discount__gte=19).order_by('price', 'pk')
+                        .values_list('article', flat=True))
+        data = self.get(**params).json()
+        self.assertIsNotNone(data['next_cursor'])
+        articles = [row['article'] for row in data['rows']]
+        while data['next_cursor']:
+            data = self.get(cursor=data['next_cursor'], **params).json()
+            articles.extend(row['article'] for row in data['rows'])
+        self.assertEqual(articles, expected)
+        self.assertNotIn('urls', data)
+
+    def test_etag_changes_with_catalog(self):
+        response = self.get(sort='name_asc')
+        etag = response['ETag']
+        self.assertEqual(self.client.get(reverse('product_table_json'), {'sort': 'name_asc'},
+                                         HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        product = Product.objects.order_by('pk').first()
+        product.name = 'АААА'
+        product.save()
+        response = self.client.get(reverse('product_table_json'), {'sort': 'name_asc'},
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['rows'][0]['name'], 'АААА')
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class OrderListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_products(5)
+        cls.products = list(Product.objects.with_effective_price().order_by('pk'))
+        manager = User.objects.create_user('manager', password='manager')
+        Profile.objects.create(user=manager, full_name='Менеджер', role='manager')
+        cls.manager = manager
+        user = User.objects.create_user('client', password='client')
+        cls.client_profile = Profile.objects.create(user=user, full_name='Клиент', role='client')
+        cls.pickup_point = PickupPoint.objects.create(address='Пункт выдачи')
+
+    def create_orders(self, count):
+        for number in range(Order.objects.count() + 1, Order.objects.count() + count + 1):
+            order = Order.objects.create(order_number=number, order_date='2026-01-10',
+                                         delivery_date='2026-01-15', pickup_point=self.pickup_point,
+                                         client=self.client_profile, pickup_code='123')
+            OrderItem.objects.bulk_create(
+                OrderItem(order=order, product=product, quantity=number % 3 + i)
+                for i, product in enumerate(self.products[:number % 4 + 1], start=1))
+
+    def list_queries(self):
+        self.client.force_login(self.manager)
+        # Первый запрос сессии ещё загружает роль пользователя
+        self.client.get(reverse('order_list'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('order_list'))
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_totals(self):
+        self.create_orders(6)
+        prices = {p.pk: p.effective_price for p in self.products}
+        for order in Order.objects.with_totals():
+            items = list(order.items.all())
+            self.assertEqual(order.items_count, len(items))
+            self.assertEqual(order.total_amount, sum(prices[i.product_id] * i.quantity for i in items))
+        self.assertEqual(Order.objects.revenue(),
+                         sum(o.total_amount for o in Order.objects.with_totals()))
+
+    def test_query_count_does_not_grow_with_orders(self):
+        self.create_orders(3)
+        _, few = self.list_queries()
+        self.create_orders(30)
+        response, many = self.list_queries()
+        self.assertEqual(len(response.context['orders']), 33)
+        self.assertEqual(many, few)
+
+
+class ProductPickerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_products(45)
+        admin = User.objects.create_user('admin', password='admin')
+        Profile.objects.create(user=admin, full_name='Администратор', role='admin')
+        cls.admin = admin
+        user = User.objects.create_user('client', password='client')
+        client_profile = Profile.objects.create(user=user, full_name='Клиент', role='client')
+        cls.product = Product.objects.get(article='A00007')
+        cls.order = Order.objects.create(
+            order_number=1, order_date='2026-01-10', delivery_date='2026-01-15',
+            pickup_point=PickupPoint.objects.create(address='Пункт выдачи'),
+            client=client_profile, pickup_code='123')
+        cls.order.items.create(product=cls.product, quantity=1)
+        rebuild_index()
+
+    def setUp(self):
+        # Ответы подсказок кэшируются по версии каталога, а bulk_create её не меняет
+        bump_catalog_version()
+        self.client.force_login(self.admin)
+
+    def lookup(self, **params):
+        return self.client.get(reverse('product_lookup'), params).json()
+
+    def test_lookup_pages_through_catalog(self):
+        data = self.lookup()
+        ids = [row['id'] for row in data['results']]
+        while data['next_cursor']:
+            data = self.lookup(cursor=data['next_cursor'])
+            ids.extend(row['id'] for row in data['results'])
+        self.assertEqual(ids, list(Product.objects.order_by('name', 'pk').values_list('pk', flat=True)))
+
+    def test_lookup_by_article(self):
+        results = self.lookup(q='A00007')['results']
+        self.assertEqual(results, [{'id': self.product.pk, 'text': product_label(self.product)}])
+
+    def test_lookup_requires_admin(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('product_lookup')).status_code, 302)
+
+    def test_order_form_renders_only_selected_products(self):
+        response = self.client.get(reverse('order_edit', kwargs={'pk': self.order.pk}))
+        content = response.content.decode()
+        self.assertIn(escape(product_label(self.product)), content)
+        self.assertNotIn('A00008', content)
+
+    def test_unknown_product_is_invalid(self):
+        formset = OrderItemFormSet({
+            'items-TOTAL_FORMS': 1, 'items-INITIAL_FORMS': 0,
+            'items-MIN_NUM_FORMS': 0, 'items-MAX_NUM_FORMS': 1000,
+            'items-0-product': Product.objects.order_by('-pk').first().pk + 1, 'items-0-quantity': 1,
+        }, instance=Order())
+        self.assertFalse(formset.is_valid())
+        self.assertIn('product', formset.forms[0].errors)
@@ -0,0 +1,163 @@
+"""
+Тесты движка замен generate_variant.
+
+Отдельный модуль, который генератор не копирует в варианты (EXCLUDE_FILES):
+в варианте замены переписали бы и ожидаемые строки, и сам импорт генератора,
+которого в варианте нет.
+"""
+import io
+import os
+import random
+import tarfile
+import tempfile
+import zipfile
+from unittest import skipUnless
+
+from django.test import SimpleTestCase
+
+from .management.commands.generate_variant import (Command as GenerateCommand, Substitution,
+                                                   build_archive, generate_variant, write_archive,
+                                                   zstandard)
+
+
+class SubstitutionTests(SimpleTestCase):
+    rules = {
+        'Product': 'Book',
+        'Product.': 'Item.',
+        'Category': 'Genre',
+        'class Category': 'class Section',
+        'Товары': 'Книги',
+    }
+    text = ('class Category(models.Model):\n'
+            'class Product(models.Model):\n'
+            '    category = models.ForeignKey(Category, on_delete=models.PROTECT)\n'
+            '    objects = ProductQuerySet.as_manager()\n'
+            'Product.objects.all()  # product_list, MyProduct, Товары, Товарный\n')
+
+    def test_result_does_not_depend_on_rule_order(self):
+        expected = Substitution(self.rules)(self.text)
+        rng = random.Random(0)
+        for _ in range(20):
+            keys = list(self.rules)
+            rng.shuffle(keys)
+            self.assertEqual(Substitution({key: self.rules[key] for key in keys})(self.text), expected)
+
+    def test_longest_key_and_word_boundaries(self):
+        self.assertEqual(Substitution(self.rules)(self.text), (
+            'class Section(models.Model):\n'
+            'class Book(models.Model):\n'
+            '    category = models.ForeignKey(Genre, on_delete=models.PROTECT)\n'
+            '    objects = ProductQuerySet.as_manager()\n'
+            'Item.objects.all()  # product_list, MyProduct, Книги, Товарный\n'))
+
+    def test_replacement_is_not_replaced_again(self):
+        swap = Substitution({'Product': 'Category', 'Category': 'Product'})
+        self.assertEqual(swap('Product, Category'), 'Category, Product')
+        chain = Substitution({'Product': 'Book', 'Book': 'Volume'})
+        self.assertEqual(chain('Product Book'), 'Book Volume')
+
+
+def make_source(root):
+    """Маленький проект: модели, модуль с их импортом, шаблон, миграция и картинка."""
+    files = {
+        'manage.py': b'# Product\n',
+        'main/models.py': (b'class Category(models.Model):\n    pass\n\n'
+                           b'class Product(models.Model):\n'
+                           b'    category = models.ForeignKey(Category, on_delete=models.PROTECT)\n'),
+        'main/views.py': b'from .models import Category, Product\nform_class = ProductForm\n',
+        'main/templates/main/base.html': '<title>Магазин обуви</title>\n'.encode('utf-8'),
+        'main/migrations/0001_initial.py': b'# Product\n',
+        'static/logo.png': b'\x89PNG Product',
+    }
+    for rel, data in files.items():
+        path = os.path.join(root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+
+
+class GenerateVariantTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.source = os.path.join(tmp.name, 'project')
+        self.destination = os.path.join(tmp.name, 'variant_01')
+        make_source(self.source)
+        self.variant = GenerateCommand().get_default_variant(1)
+
+    def generate(self, **kwargs):
+        return generate_variant(1, self.variant, self.source, self.destination, link_mode='copy', **kwargs)
+
+    def read(self, rel):
+        with open(os.path.join(self.destination, rel), encoding='utf-8') as f:
+            return f.read()
+
+    def test_models_renamed_in_every_module(self):
+        self.generate()
+        self.assertIn('class Book(models.Model):', self.read('main/models.py'))
+        self.assertIn('models.ForeignKey(Genre,', self.read('main/models.py'))
+        self.assertEqual(self.read('main/views.py'),
+                         'from .models import Genre, Book\nform_class = ProductForm\n')
+        self.assertEqual(self.read('main/templates/main/base.html'), '<title>Книжный магазин</title>\n')
+        # Вне приложения файлы переносятся как есть, миграции создаются заново
+        self.assertEqual(self.read('manage.py'), '# Product\n')
+        self.assertEqual(os.listdir(os.path.join(self.destination, 'main', 'migrations')),
+                         ['__init__.py'])
+
+    def test_second_run_is_incremental(self):
+        first = self.generate()
+        self.assertEqual((first['files'], first['rewritten'], first['linked']), (5, 3, 2))
+        self.assertEqual(self.generate()['unchanged'], 5)
+
+        with open(os.path.join(self.source, 'main', 'views.py'), 'a', encoding='utf-8') as f:
+            f.write('Product.objects.all()\n')
+        os.remove(os.path.join(self.source, 'static', 'logo.png'))
+        stats = self.generate()
+        self.assertEqual((stats['rewritten'], stats['unchanged'], stats['removed']), (1, 3, 1))
+        self.assertTrue(self.read('main/views.py').endswith('Book.objects.all()\n'))
+        self.assertFalse(os.path.exists(os.path.join(self.destination, 'static', 'logo.png')))
+
+    def test_clean_regenerates_everything(self):
+        self.generate()
+        stats = self.generate(clean=True)
+        self.assertEqual((stats['unchanged'], stats['rewritten'] + stats['linked']), (0, 5))
+
+
+class VariantArchiveTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+        self.source = os.path.join(tmp.name, 'project')
+        make_source(self.source)
+        self.variant = GenerateCommand().get_default_variant(1)
+
+    def test_zip_matches_directory_variant(self):
+        destination = os.path.join(self.tmp, 'variant_01')
+        generate_variant(1, self.variant, self.source, destination, link_mode='copy')
+        path = os.path.join(self.tmp, 'variant_01.zip')
+        stats = write_archive(1, self.variant, self.source, path)
+        # Временный файл архива переименован в итоговый
+        self.assertEqual(sorted(os.listdir(self.tmp)), ['project', 'variant_01', 'variant_01.zip'])
+        self.assertEqual((stats['files'], stats['rewritten'], stats['linked']), (5, 3, 2))
+
+        with zipfile.ZipFile(path) as archive:
+            names = set(archive.namelist())
+            for rel in ('manage.py', 'main/models.py', 'main/views.py',
+                        'main/templates/main/base.html', 'static/logo.png'):
+                with open(os.path.join(destination, rel), 'rb') as f:
+                    self.assertEqual(archive.read(f'variant_01/{rel}'), f.read(), rel)
+            self.assertEqual(archive.getinfo('variant_01/static/logo.png').compress_type,
+                             zipfile.ZIP_STORED)
+        self.assertIn('variant_01/main/migrations/__init__.py', names)
+        self.assertNotIn('variant_01/main/migrations/0001_initial.py', names)
+        self.assertTrue(all(name.startswith('variant_01/') for name in names))
+
+    @skipUnless(zstandard, 'нужен пакет zstandard')
+    def test_tar_zst(self):
+        buffer = io.BytesIO()
+        build_archive(1, self.variant, self.source, buffer, fmt='tar.zst')
+        data = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(buffer.getvalue()))
+        with tarfile.open(fileobj=data, mode='r|') as archive:
+            names = [member.name for member in archive]
+        self.assertIn('variant_01/main/models.py', names)
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 from django.contrib.auth.views import LogoutView
 from . import views
@@ -7,7 +8,13 @@ urlpatterns = [
     path('logout/', LogoutView.as_view(), name='logout'),
     path('', views.product_list, name='product_list'),
     path('product_table_partial/', views.product_table_partial, name='product_table_partial'),
+    path('product_rows_partial/', views.product_rows_partial, name='product_rows_partial'),
+    path('product_table_json/', views.product_table_json, name='product_table_json'),
     
+    # Миниатюры фото: путь совпадает с файлом кэша в MEDIA_ROOT
+    path(f'{settings.MEDIA_URL.lstrip("/")}thumbs/<int:width>x<int:height>/<path:rest>',
+         views.product_thumbnail, name='product_thumbnail'),
+
     # Маршруты для товаров
     path('product/add/', views.ProductCreateView.as_view(), name='product_add'),
     path('product/<int:pk>/edit/', views.ProductUpdateView.as_view(), name='product_edit'),
@@ -16,7 +23,11 @@ urlpatterns = [
     
     # Маршруты для заказов
     path('orders/', views.OrderListView.as_view(), name='order_list'),
+    path('orders/product_lookup/', views.product_lookup, name='product_lookup'),
     path('order/add/', views.OrderCreateView.as_view(), name='order_add'),
     path('order/<int:pk>/edit/', views.OrderUpdateView.as_view(), name='order_edit'),
     path('order/<int:pk>/delete/', views.OrderDeleteView.as_view(), name='order_delete'),
+
+    path('export/<str:name>/', views.export_data, name='export_data'),
+    path('cache_stats/', views.cache_stats, name='cache_stats'),
 ]
\ No newline at end of file
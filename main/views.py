@@ -1,22 +1,46 @@
+import hashlib
+import tempfile
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (FileResponse, Http404, HttpResponse, HttpResponseBadRequest, JsonResponse,
+                         StreamingHttpResponse)
 from django.shortcuts import render, redirect
+from django.template.loader import render_to_string
+from django.utils._os import safe_join
 from django.contrib.auth.views import LoginView
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
-from django.db.models import Q
+from django.db import transaction
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
+from django.template.defaultfilters import floatformat
+from django.utils import formats
+from django.utils.text import Truncator
 from django.contrib.messages.views import SuccessMessageMixin
 from django.utils.decorators import method_decorator
-from .models import Product, Supplier, Order, OrderItem, Profile
-from .forms import ProductForm, OrderForm, OrderItemFormSet
-from django.views.decorators.http import require_POST
+from django.utils.http import content_disposition_header
+from .models import Product, Supplier, Order, OrderItem
+from .forms import ProductForm, OrderForm, OrderItemFormSet, product_label
+from .cache import fragment_key, get_or_query, get_or_render
+from .export import (COMPRESSIONS, CONTENT_TYPES, EXPORTS, FORMATS, export_filename, stream_export,
+                     write_xlsx)
+from .pagination import keyset_page, order_for_sort
+from .photos import (THUMBNAIL_FORMATS, THUMBNAIL_SIZES, available_formats, ensure_thumbnail,
+                     evict_thumbnails, parse_thumbnail_name)
+from .roles import user_role
+from .search import search_products
+from .stock import OutOfStock, apply_stock_changes, release_order, stock_changes
+from .streaming import stream_table
+from django.views.decorators.http import condition, require_POST
 from django.shortcuts import get_object_or_404
 # ---- Декораторы для проверки ролей ----
 def is_admin(user):
-    return hasattr(user, 'profile') and user.profile.role == 'admin'
+    return user_role(user).is_admin
 
 def is_manager_or_admin(user):
-    return hasattr(user, 'profile') and user.profile.role in ['manager', 'admin']
+    return user_role(user).is_manager_or_admin
 
 class AdminRequiredMixin:
     @method_decorator(login_required)
@@ -36,34 +60,15 @@ class CustomLoginView(LoginView):
     redirect_authenticated_user = True
 
 # ---- Список товаров ----
-def product_list(request):
-    template = 'main/product_list.html'
-    products = Product.objects.all().select_related('category', 'supplier', 'manufacturer')
-    context = {'products': products}
-    if request.user.is_authenticated:
-        try:
-            role = request.user.profile.role
-        except Profile.DoesNotExist:
-            role = None
-        if role in ['manager', 'admin']:
-            context['show_filters'] = True
-    return render(request, template, context)
-
-def product_table_partial(request):
-    products = Product.objects.all().select_related('category', 'supplier', 'manufacturer')
-    search = request.GET.get('search', '')
-    discount_range = request.GET.get('discount_range', '')
-    sort = request.GET.get('sort', '')
+def _filter_products(params):
+    """Применяет к каталогу фильтры поиска и диапазона скидок из GET-параметров."""
+    products = Product.objects.with_effective_price().select_related(
+        'category', 'supplier', 'manufacturer')
+    search = params.get('search', '')
+    discount_range = params.get('discount_range', '')
 
     if search:
-        products = products.filter(
-            Q(name__icontains=search) |
-            Q(article__icontains=search) |
-            Q(description__icontains=search) |
-            Q(category__name__icontains=search) |
-            Q(supplier__name__icontains=search) |
-            Q(manufacturer__name__icontains=search)
-        )
+        products = search_products(products, search)
     if discount_range:
         if discount_range == '0-11.99':
             products = products.filter(discount__lt=12)
@@ -71,21 +76,132 @@ def product_table_partial(request):
             products = products.filter(discount__gte=12, discount__lt=19)
         elif discount_range == '19+':
             products = products.filter(discount__gte=19)
+    return products
+
+def _product_sort(request, products):
+    sort = request.GET.get('sort', '')
+    # Без явной сортировки результаты поиска выводятся по релевантности
+    if sort in ('', 'relevance'):
+        sort = 'relevance' if 'search_rank' in products.query.annotations else ''
+    return sort
+
+def _product_page(request):
+    products = _filter_products(request.GET)
+    rows, next_cursor = keyset_page(products, _product_sort(request, products),
+                                    request.GET.get('cursor'))
+    return {'products': rows, 'next_cursor': next_cursor}
+
+def _wants_stream(request):
+    """?stream=1 — вся таблица без пагинации, только для администратора."""
+    return request.GET.get('stream') == '1' and is_admin(request.user)
+
+def _catalog_key(request, name):
+    """
+    Ключ фрагмента каталога.
+
+    Содержимое зависит только от GET-параметров и того, админ ли пользователь
+    (колонка действий), поэтому эти значения и образуют ключ.
+    """
+    role = 'admin' if is_admin(request.user) else 'other'
+    return fragment_key(name, request.GET, role)
+
+def _catalog_fragment(request, template_name):
+    """Отрендеренный фрагмент каталога из кэша."""
+    key = _catalog_key(request, template_name)
+    return get_or_render(key, lambda: render_to_string(
+        template_name, _product_page(request), request=request))
+
+def product_list(request):
+    template = 'main/product_list.html'
+    context = {'product_table': _catalog_fragment(request, 'main/partials/product_table.html')}
+    if is_manager_or_admin(request.user):
+        context['show_filters'] = True
+    return render(request, template, context)
+
+def product_table_partial(request):
+    if _wants_stream(request):
+        products = _filter_products(request.GET)
+        return stream_table(request, 'main/partials/product_table.html',
+                            'main/partials/product_rows.html', 'products',
+                            order_for_sort(products, _product_sort(request, products)))
+    return HttpResponse(_catalog_fragment(request, 'main/partials/product_table.html'))
+
+def product_rows_partial(request):
+    """Следующая страница строк таблицы для бесконечной прокрутки."""
+    return HttpResponse(_catalog_fragment(request, 'main/partials/product_rows.html'))
+
+def _product_json(request):
+    """Компактные данные строк таблицы; клиент сам собирает из них разметку."""
+    page = _product_page(request)
+    data = {
+        'rows': [{
+            'id': p.id,
+            'article': p.article,
+            'name': Truncator(p.name).chars(50),
+            'category': p.category.name,
+            'price': formats.localize(p.price),
+            'new_price': floatformat(p.effective_price, 2) if p.discount > 0 else None,
+            'discount': p.discount,
+            'quantity': p.quantity_in_stock,
+            'photo': p.photo.name or None,
+        } for p in page['products']],
+        'next_cursor': page['next_cursor'],
+        'thumbs': {
+            'media_url': settings.MEDIA_URL,
+            'formats': [THUMBNAIL_FORMATS[fmt][0] for fmt in available_formats() if fmt != 'jpeg'],
+        },
+    }
+    if is_admin(request.user):
+        data['urls'] = {
+            'edit': reverse('product_edit', args=[0]),
+            'delete': reverse('product_delete', args=[0]),
+        }
+    return data
+
+def _catalog_etag(request):
+    return hashlib.md5(_catalog_key(request, 'json').encode('utf-8')).hexdigest()
+
+@condition(etag_func=_catalog_etag)
+def product_table_json(request):
+    """
+    Строки каталога в JSON для живого поиска.
+
+    ETag вычисляется из ключа кэша (в нём версия каталога), поэтому повторный
+    запрос с теми же фильтрами получает 304 без обращения к базе.
+    """
+    return JsonResponse(get_or_query(_catalog_key(request, 'json'), lambda: _product_json(request)))
+
+# ---- Миниатюры фото ----
+_thumbnails_created = 0
 
-    if sort == 'price_asc':
-        products = products.order_by('price')
-    elif sort == 'price_desc':
-        products = products.order_by('-price')
-    elif sort == 'name_asc':
-        products = products.order_by('name')
-    elif sort == 'name_desc':
-        products = products.order_by('-name')
-    elif sort == 'quantity_asc':
-        products = products.order_by('quantity_in_stock')
-    elif sort == 'quantity_desc':
-        products = products.order_by('-quantity_in_stock')
-
-    return render(request, 'main/partials/product_table.html', {'products': products})
+def product_thumbnail(request, width, height, rest):
+    """
+    Отдаёт миниатюру по детерминированному URL, создавая её при первом запросе.
+
+    Готовые файлы лежат по тому же пути в MEDIA_ROOT, так что в продакшене
+    их отдаёт веб-сервер, а сюда доходят только промахи кэша.
+    """
+    global _thumbnails_created
+    parsed = parse_thumbnail_name(rest)
+    if (width, height) not in THUMBNAIL_SIZES or parsed is None or parsed[1] not in available_formats():
+        raise Http404
+    name, fmt = parsed
+    # Миниатюры делаются только из фото товаров, а не из любого файла в MEDIA_ROOT
+    if not name.startswith('products/'):
+        raise Http404
+    try:
+        safe_join(settings.MEDIA_ROOT, name)
+    except SuspiciousFileOperation:
+        raise Http404
+    path, created = ensure_thumbnail(str(settings.MEDIA_ROOT), name, (width, height), fmt)
+    if path is None:
+        raise Http404
+    _thumbnails_created += created
+    if created and _thumbnails_created % settings.THUMBNAIL_EVICT_EVERY == 0:
+        evict_thumbnails(str(settings.MEDIA_ROOT), settings.THUMBNAIL_CACHE_MAX_BYTES)
+    response = FileResponse(open(path, 'rb'), content_type=f'image/{fmt}')
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
 
 @require_POST
 @login_required
@@ -127,69 +243,153 @@ class ProductUpdateView(AdminRequiredMixin, SuccessMessageMixin, UpdateView):
         return super().dispatch(request, *args, **kwargs)"""
 
 # ---- Заказы ----
+LOOKUP_PAGE_SIZE = 20
+
+@login_required
+@user_passes_test(is_admin)
+def product_lookup(request):
+    """
+    Подсказки для выбора товара в строке заказа.
+
+    Поиск по артикулу и названию (FTS5, либо icontains), страницы по
+    LOOKUP_PAGE_SIZE через курсор — как у каталога. Ответы кэшируются до
+    изменения каталога.
+    """
+    def query():
+        products = Product.objects.only('id', 'article', 'name')
+        search = request.GET.get('q', '').strip()
+        sort = 'name_asc'
+        if search:
+            products = search_products(products, search, columns=('article', 'name'))
+            if 'search_rank' in products.query.annotations:
+                sort = 'relevance'
+        rows, next_cursor = keyset_page(products, sort, request.GET.get('cursor'),
+                                        page_size=LOOKUP_PAGE_SIZE)
+        return {
+            'results': [{'id': p.id, 'text': product_label(p)} for p in rows],
+            'next_cursor': next_cursor,
+        }
+
+    return JsonResponse(get_or_query(fragment_key('lookup', request.GET, 'admin'), query))
+
 class OrderListView(ManagerOrAdminRequiredMixin, ListView):
     model = Order
     template_name = 'main/order_list.html'
     context_object_name = 'orders'
-    ordering = ['-order_date']
+    ordering = ['-order_date', '-id']
+    paginate_by = 50
 
-class OrderCreateView(AdminRequiredMixin, CreateView):
-    model = Order
-    form_class = OrderForm
-    template_name = 'main/order_form.html'
-    success_url = reverse_lazy('order_list')
+    def get_queryset(self):
+        return super().get_queryset().select_related('pickup_point', 'client').with_totals()
 
-    def get_context_data(self, **kwargs):
-        data = super().get_context_data(**kwargs)
-        if self.request.POST:
-            data['formset'] = OrderItemFormSet(self.request.POST)
-        else:
-            data['formset'] = OrderItemFormSet()
-        return data
+    def get(self, request, *args, **kwargs):
+        if _wants_stream(request):
+            return stream_table(request, self.template_name, 'main/partials/order_rows.html',
+                                self.context_object_name, self.get_queryset())
+        return super().get(request, *args, **kwargs)
 
-    def form_valid(self, form):
-        context = self.get_context_data()
-        formset = context['formset']
-        if formset.is_valid():
-            self.object = form.save()
-            formset.instance = self.object
-            formset.save()
-            messages.success(self.request, 'Заказ создан')
-            return redirect(self.success_url)
-        else:
-            return self.render_to_response(self.get_context_data(form=form))
-
-class OrderUpdateView(AdminRequiredMixin, UpdateView):
+class OrderFormMixin:
+    """
+    Общая часть создания и редактирования заказа.
+
+    Формсет позиций собирается и проверяется один раз, а заказ с позициями
+    сохраняется одной транзакцией (см. BaseOrderItemFormSet.save_bulk)
+    вместе с изменением резервов на складе (main/stock.py).
+    """
     model = Order
     form_class = OrderForm
     template_name = 'main/order_form.html'
     success_url = reverse_lazy('order_list')
+    success_message = ''
+
+    def get_formset(self):
+        if self.request.method == 'POST':
+            return OrderItemFormSet(self.request.POST, instance=self.object)
+        return OrderItemFormSet(instance=self.object)
 
     def get_context_data(self, **kwargs):
-        data = super().get_context_data(**kwargs)
-        if self.request.POST:
-            data['formset'] = OrderItemFormSet(self.request.POST, instance=self.object)
-        else:
-            data['formset'] = OrderItemFormSet(instance=self.object)
-        return data
+        if 'formset' not in kwargs:
+            kwargs['formset'] = self.get_formset()
+        return super().get_context_data(**kwargs)
 
     def form_valid(self, form):
-        context = self.get_context_data()
-        formset = context['formset']
-        if formset.is_valid():
-            self.object = form.save()
-            formset.instance = self.object
-            formset.save()
-            messages.success(self.request, 'Заказ обновлён')
-            return redirect(self.success_url)
-        else:
-            return self.render_to_response(self.get_context_data(form=form))
+        formset = self.get_formset()
+        if not formset.is_valid():
+            return self.render_to_response(self.get_context_data(form=form, formset=formset))
+        before = (form.initial['status'], formset.quantities(initial=True)) if self.object else None
+        after = (form.cleaned_data['status'], formset.quantities())
+        try:
+            with transaction.atomic():
+                apply_stock_changes(stock_changes(before, after),
+                                    {p.pk: p.article for p in formset.products.values()})
+                self.object = form.save()
+                formset.save_bulk(self.object)
+        except OutOfStock as e:
+            form.add_error(None, str(e))
+            return self.render_to_response(self.get_context_data(form=form, formset=formset))
+        messages.success(self.request, self.success_message)
+        return redirect(self.success_url)
+
+class OrderCreateView(AdminRequiredMixin, OrderFormMixin, CreateView):
+    success_message = 'Заказ создан'
+
+class OrderUpdateView(AdminRequiredMixin, OrderFormMixin, UpdateView):
+    success_message = 'Заказ обновлён'
 
 class OrderDeleteView(AdminRequiredMixin, DeleteView):
     model = Order
     success_url = reverse_lazy('order_list')
     template_name = 'main/order_confirm_delete.html'
 
-    def delete(self, request, *args, **kwargs):
-        messages.success(request, 'Заказ удалён')
-        return super().delete(request, *args, **kwargs)
\ No newline at end of file
+    def form_valid(self, form):
+        with transaction.atomic():
+            release_order(self.object)
+            response = super().form_valid(form)
+        messages.success(self.request, 'Заказ удалён')
+        return response
+
+# ---- Выгрузка ----
+@login_required
+@user_passes_test(is_admin)
+def export_data(request, name):
+    """
+    Выгрузка ?format=csv|jsonl|xlsx[&compress=gzip|zstd] (см. main/export.py).
+
+    CSV и JSON Lines отдаются потоком по мере чтения из базы; XLSX
+    собирается во временном файле и отдаётся с диска.
+    """
+    if name not in EXPORTS:
+        raise Http404
+    fmt = request.GET.get('format', 'csv')
+    compression = request.GET.get('compress') or None
+    if fmt not in FORMATS or (compression and (compression not in COMPRESSIONS or fmt == 'xlsx')):
+        return HttpResponseBadRequest('Неизвестный формат или сжатие')
+    filename = export_filename(name, fmt, compression)
+
+    if fmt == 'xlsx':
+        f = tempfile.TemporaryFile()
+        write_xlsx(name, f)
+        f.seek(0)
+        return FileResponse(f, as_attachment=True, filename=filename,
+                            content_type=CONTENT_TYPES['xlsx'])
+    try:
+        chunks = stream_export(name, fmt, compression)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    response = StreamingHttpResponse(chunks, content_type=CONTENT_TYPES[compression or fmt])
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+# ---- Служебное ----
+@login_required
+@user_passes_test(is_admin)
+def cache_stats(request):
+    """Попадания и промахи именованных кэшей (см. main/cache_backends.py)."""
+    data = {}
+    for alias, options in settings.CACHES.items():
+        cache = caches[alias]
+        data[alias] = {'backend': options['BACKEND'], 'location': str(options.get('LOCATION', ''))}
+        if hasattr(cache, 'stats'):
+            data[alias].update(cache.stats())
+    return JsonResponse(data)
\ No newline at end of file
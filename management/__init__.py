@@ -1 +0,0 @@
-# Management commands package
\ No newline at end of file
@@ -1 +0,0 @@
-# Management commands
\ No newline at end of file
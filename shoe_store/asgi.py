@@ -9,8 +9,15 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'shoe_store.settings')
 
 application = get_asgi_application()
+
+# Шаблоны разбираются заранее только в процессе веб-сервера: командам
+# manage.py (migrate, import_data, process_photos) они не нужны
+if settings.TEMPLATE_WARMUP:
+    from main.template_cache import warm_templates
+    warm_templates()
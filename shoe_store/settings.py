@@ -1,11 +1,13 @@
 import os
+import tempfile
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = 'django-insecure-7x@0^_x4!d%9q&*h#y@2w-5$k+8z#_p!q3$e&f1g2h3i4j5k6l7m8n9o0p'
-DEBUG = True
-ALLOWED_HOSTS = []
+# Рабочий режим: DJANGO_DEBUG=0 и список хостов в DJANGO_ALLOWED_HOSTS через запятую
+DEBUG = os.environ.get('DJANGO_DEBUG', '1') == '1'
+ALLOWED_HOSTS = [host for host in os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',') if host]
 
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -23,6 +25,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'main.middleware.RoleMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -33,27 +36,119 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'main.context_processors.role',
+            ],
+            # В рабочем режиме каждый шаблон разбирается один раз на процесс
+            # и без отладочной информации; при разработке Django сам
+            # сбрасывает кэш шаблонов при их изменении
+            'debug': DEBUG,
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
             ],
         },
     },
 ]
 
+# Разобрать все шаблоны при запуске процесса веб-сервера (shoe_store/wsgi.py,
+# main/template_cache.py); команды manage.py шаблоны заранее не разбирают
+TEMPLATE_WARMUP = os.environ.get('TEMPLATE_WARMUP', '0' if DEBUG else '1') == '1'
+
 WSGI_APPLICATION = 'shoe_store.wsgi.application'
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# База данных задаётся переменными окружения:
+#   DB_ENGINE=sqlite (по умолчанию) — файл SQLITE_PATH (db.sqlite3);
+#   DB_ENGINE=postgresql — DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT
+#   (нужен пакет psycopg). Пул соединений для PostgreSQL — PgBouncer перед
+#   базой: DB_HOST/DB_PORT указывают на него, DB_PGBOUNCER=1.
+#   DB_CONN_MAX_AGE — сколько секунд поток держит соединение между запросами.
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 600))
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'shoe_store'),
+            'USER': os.environ.get('DB_USER', 'postgres'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            # В режиме pool_mode=transaction серверные курсоры PgBouncer не поддерживает
+            'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('DB_PGBOUNCER') == '1',
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'main.backends.sqlite3',
+            'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'OPTIONS': {
+                'timeout': 20,  # busy timeout: сколько секунд ждать блокировку записи
+                'transaction_mode': 'IMMEDIATE',
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA mmap_size=268435456;'
+                    'PRAGMA temp_store=MEMORY;'
+                ),
+            },
+        }
     }
+
+# Кэши задаются переменной CACHE_BACKEND:
+#   locmem (по умолчанию при DEBUG) — память процесса, у каждого процесса свой кэш;
+#   file (по умолчанию в рабочем режиме) — общий для всех процессов кэш в каталоге CACHE_DIR;
+#   db — общий кэш в таблицах базы (создать: manage.py createcachetable).
+# fragments — HTML фрагментов каталога, querysets — результаты запросов,
+# sessions — сессии (поверх базы, см. SESSION_ENGINE).
+# versions — номера версий каталога и профилей (main/cache.py). Они всегда в общем кэше
+# (file, либо db при CACHE_BACKEND=db): изменение, сделанное в одном процессе
+# или в команде manage.py, должно сразу стать видно всем процессам сервера.
+# В рабочем режиме сервер обычно запущен в несколько процессов, поэтому по
+# умолчанию кэш общий: иначе каждый процесс держал бы свою копию фрагментов
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem' if DEBUG else 'file')
+# По умолчанию вне каталога проекта, чтобы файлы кэша не попадали в рабочее дерево
+CACHE_DIR = Path(os.environ.get('CACHE_DIR', Path(tempfile.gettempdir()) / 'shoe_store_cache'))
+
+
+def _cache(name, timeout, backend_name=CACHE_BACKEND):
+    if backend_name == 'file':
+        backend, location = 'main.cache_backends.FileBasedCache', str(CACHE_DIR / name)
+    elif backend_name == 'db':
+        backend, location = 'main.cache_backends.DatabaseCache', f'cache_{name}'
+    else:
+        backend, location = 'main.cache_backends.LocMemCache', name
+    return {
+        'BACKEND': backend,
+        'LOCATION': location,
+        'TIMEOUT': timeout,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+
+
+CACHES = {
+    'default': _cache('default', 300),
+    'fragments': _cache('fragments', 300),
+    'querysets': _cache('querysets', 60),
+    'sessions': _cache('sessions', 60 * 60 * 24 * 14),
+    'versions': _cache('versions', None, 'db' if CACHE_BACKEND == 'db' else 'file'),
 }
 
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'sessions'
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -72,6 +167,13 @@ STATICFILES_DIRS = [BASE_DIR / 'main/static']
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Кэш миниатюр фото товаров (MEDIA_ROOT/thumbs)
+THUMBNAIL_CACHE_MAX_BYTES = 512 * 1024 * 1024
+THUMBNAIL_EVICT_EVERY = 200  # проверять размер кэша после каждой N-й новой миниатюры
+
+# Форма заказа отправляет по 4-5 полей на позицию; запас на заказы из сотен строк
+DATA_UPLOAD_MAX_NUMBER_FIELDS = 5000
+
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'product_list'
 LOGOUT_REDIRECT_URL = 'login'
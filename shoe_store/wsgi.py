@@ -9,8 +9,15 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'shoe_store.settings')
 
 application = get_wsgi_application()
+
+# Шаблоны разбираются заранее только в процессе веб-сервера: командам
+# manage.py (migrate, import_data, process_photos) они не нужны
+if settings.TEMPLATE_WARMUP:
+    from main.template_cache import warm_templates
+    warm_templates()